@@ -6,19 +6,224 @@ CareBot AI Service — Patient status analysis powered by Claude API
 Analyzes position change logs to provide summaries for caregivers/medical staff
 """
 
+import asyncio
+import bisect
+import hashlib
 import os
 import json
-from datetime import datetime, timedelta
-from typing import Optional
+import operator
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Literal, Optional
 import httpx
 
+try:
+    import orjson  # 빠른 JSON 직렬화 / Fast JSON serialization
+except ImportError:
+    orjson = None  # 제한된 배포 환경에서는 표준 json 사용 / Fall back to stdlib json
+
+try:
+    import h2  # noqa: F401 — httpx의 HTTP/2 지원에 필요 / required for httpx HTTP/2
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
 # Anthropic API 설정 / Anthropic API configuration
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY", "")
 ANTHROPIC_API_URL = "https://api.anthropic.com/v1/messages"
 AI_MODEL = "claude-sonnet-4-6"  # 효율적인 모델 사용 / Use efficient model
+AI_MODEL_FAST = "claude-haiku-4-5"  # 단순한 상태 요약용 / For simple status summaries
+
+# API 사용 한도 (계정 등급에 맞게 조정) / API rate limits (adjust to account tier)
+REQUESTS_PER_MINUTE = int(os.getenv("ANTHROPIC_REQUESTS_PER_MINUTE", "50"))
+TOKENS_PER_MINUTE = int(os.getenv("ANTHROPIC_TOKENS_PER_MINUTE", "40000"))
+
+# 이 시간보다 오래된 기록은 호출 간 변하지 않으므로 프롬프트 캐시 대상
+# Logs older than this rarely change between calls, so they go in the cached prefix
+STABLE_LOG_AGE = timedelta(minutes=10)
+
+# 동일 요청 응답 캐시 (로그+상태 해시 → (저장 시각, 결과))
+# Exact-match response cache (logs+status hash → (stored at, result))
+_CACHE_TTL = 300  # 초 / seconds
+_CACHE_MAX = 128
+_SUMMARY_CACHE: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+# 근사 일치 캐시 — 상태 특징 벡터가 가까우면 직전 요약 재사용
+# Near-match cache — reuse a recent summary when the state fingerprint is close
+_SEMANTIC_TAU = 1.5  # L1 거리 임계값 / L1 distance threshold
+_SEMANTIC_TTL = 300  # 초 / seconds
+_SEMANTIC_CACHE: deque[tuple[tuple[float, ...], dict, float]] = deque(maxlen=8)
+_HOURS_BUCKETS = (1, 2, 4, 8)  # 경과 시간 구간 경계 / Hours-since bucket edges
+_POSITIONS = ("supine", "left_lateral", "right_lateral")
+
+# 기록 시각 추출 (ISO-8601 문자열은 사전순 = 시간순)
+# Log timestamp accessor (ISO-8601 strings sort lexically in time order)
+_log_time = operator.itemgetter("time")
+
+# 요청 일괄 처리 — 대기 창 안에 들어온 요청을 모아 처리
+# Request coalescing — requests arriving within the window are handled together
+_BATCH_WINDOW = 0.2  # 초 / seconds
+_PENDING: list[tuple[dict, asyncio.Future]] = []
+_FLUSH_TASK: Optional[asyncio.Task] = None
+_IN_FLIGHT: dict[str, asyncio.Task] = {}  # 캐시 키 → 진행 중 호출 / cache key → call in progress
+
+
+class _RateLimiter:
+    """
+    요청 수/토큰 수 기반 사전 속도 제한 (토큰 버킷)
+    Proactive request/token rate limiter (token bucket)
+
+    429를 받은 뒤 실패하는 대신, 한도 안에서만 호출되도록 미리 대기
+    Waits before calling so requests stay within limits, instead of failing on 429
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.max_request_capacity = requests_per_minute
+        self.max_token_capacity = tokens_per_minute
+        self.available_request_capacity = float(requests_per_minute)
+        self.available_token_capacity = float(tokens_per_minute)
+        self.blocked_until = 0.0
+        self._last_update = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        """경과 시간만큼 용량 보충 / Refill capacity for the elapsed time"""
+        now = time.monotonic()
+        elapsed = now - self._last_update
+        self._last_update = now
+        self.available_request_capacity = min(
+            self.max_request_capacity,
+            self.available_request_capacity + elapsed * self.max_request_capacity / 60,
+        )
+        self.available_token_capacity = min(
+            self.max_token_capacity,
+            self.available_token_capacity + elapsed * self.max_token_capacity / 60,
+        )
+
+    @property
+    def tokens_remaining(self) -> int:
+        """현재 사용 가능한 토큰 수 / Currently available token capacity"""
+        self._refill()
+        return int(self.available_token_capacity)
+
+    async def acquire(self, tokens: int):
+        """요청 1건과 토큰을 확보할 때까지 대기 / Wait until one request and the tokens are available"""
+        tokens = min(tokens, self.max_token_capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                wait = self.blocked_until - time.monotonic()
+                if wait <= 0:
+                    if (
+                        self.available_request_capacity >= 1
+                        and self.available_token_capacity >= tokens
+                    ):
+                        self.available_request_capacity -= 1
+                        self.available_token_capacity -= tokens
+                        return
+                    # 부족한 용량이 채워질 때까지의 시간 / Time until the shortfall refills
+                    wait = max(
+                        (1 - self.available_request_capacity) * 60 / self.max_request_capacity,
+                        (tokens - self.available_token_capacity) * 60 / self.max_token_capacity,
+                    )
+                await asyncio.sleep(wait)
+
+    def penalize(self, retry_after: float):
+        """429 응답의 retry-after 만큼 호출 중단 / Hold off calls for a 429's retry-after"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+        self.available_request_capacity = 0.0
+
+
+_LIMITER = _RateLimiter(REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE)
+
+# retry-after 헤더가 없거나 해석 불가할 때 대기 시간 / Back-off when retry-after is missing or unparseable
+_RETRY_AFTER_DEFAULT = 1.0  # 초 / seconds
+
+
+def _retry_after_seconds(value: Optional[str]) -> float:
+    """
+    retry-after 헤더를 대기 초로 변환 (초 또는 HTTP 날짜 형식)
+    Convert a retry-after header to seconds (delta-seconds or HTTP-date form)
+    """
+    if not value:
+        return _RETRY_AFTER_DEFAULT
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return _RETRY_AFTER_DEFAULT
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+# 회로 차단기 — 연속 실패 시 일정 시간 API 호출 없이 기본 요약 반환
+# Circuit breaker — after repeated failures, serve basic summaries without calling the API
+_CB_THRESHOLD = 3  # 연속 실패 횟수 / Consecutive failures
+_CB_COOLDOWN = 60  # 초 / seconds
+_CB = {"failures": 0, "opened_at": 0.0, "probing": False}
+
+# 재사용 HTTP 클라이언트 (TLS 연결 유지) / Shared HTTP client (keeps TLS connections alive)
+_CLIENT: Optional[httpx.AsyncClient] = None
 
 
-async def get_patient_summary(logs: list[dict], current_status: dict) -> dict:
+def _get_client() -> httpx.AsyncClient:
+    """공유 AsyncClient 지연 생성 / Lazily create the shared AsyncClient"""
+    global _CLIENT
+    if _CLIENT is None or _CLIENT.is_closed:
+        _CLIENT = httpx.AsyncClient(
+            http2=_HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            limits=httpx.Limits(max_keepalive_connections=10, max_connections=20),
+            headers={
+                "x-api-key": ANTHROPIC_API_KEY,
+                "anthropic-version": "2023-06-01",
+                "content-type": "application/json",
+            },
+        )
+    return _CLIENT
+
+
+async def close_client():
+    """공유 클라이언트 종료 (앱 종료 시 호출) / Close the shared client on app shutdown"""
+    global _CLIENT
+    if _CLIENT is not None:
+        await _CLIENT.aclose()
+        _CLIENT = None
+
+
+async def close_service():
+    """
+    AI 루프 종료 전 정리 — 남은 작업 취소, 대기열 초기화, 클라이언트 종료
+    Clean up before the AI loop stops — cancel leftover tasks, reset the queues, close the client
+
+    모듈 상태가 닫힌 루프에 묶여 남지 않으므로 다음 수명 주기의 새 루프에서 다시 사용 가능
+    No module state stays bound to the closed loop, so the next lifespan's fresh loop can reuse it
+    """
+    global _FLUSH_TASK
+    current = asyncio.current_task()
+    tasks = [task for task in asyncio.all_tasks() if task is not current]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    for _, future in _PENDING:
+        future.cancel()
+    _PENDING.clear()
+    _IN_FLIGHT.clear()
+    _FLUSH_TASK = None
+    # 잠금만 새로 만들어 속도 제한 상태(429 대기 포함)는 유지 / Replace only the lock, keeping rate-limit state (incl. 429 back-off)
+    _LIMITER._lock = asyncio.Lock()
+    await close_client()
+
+
+async def get_patient_summary(
+    logs: list[dict], current_status: dict, urgent: bool = False
+) -> dict:
     """
     Claude AI를 사용하여 환자 자세 변환 현황 요약 생성
     Generate patient repositioning status summary using Claude AI
@@ -26,68 +231,464 @@ async def get_patient_summary(logs: list[dict], current_status: dict) -> dict:
     Args:
         logs: 자세 변환 기록 목록 / Position change log list
         current_status: 현재 로봇 상태 / Current robot status
+        urgent: True면 일괄 대기 없이 즉시 호출 / If True, call immediately without batching
 
     Returns:
         AI 분석 요약 딕셔너리 / AI analysis summary dictionary
     """
+    immediate, request = _resolve_summary(logs, current_status)
+    if immediate is not None:
+        return immediate
+
+    if urgent:
+        return await _request_summary(request)
+
+    # 급하지 않은 요청은 짧은 창 동안 모아 같은 입력끼리 한 번만 호출
+    # Non-urgent requests are coalesced over a short window, one call per distinct input
+    return await _enqueue_summary(request)
+
+
+async def get_patient_summary_stream(
+    logs: list[dict], current_status: dict
+) -> AsyncIterator[str]:
+    """
+    요약 텍스트를 생성되는 대로 조각 단위로 반환 (대시보드 점진 표시용)
+    Yield the summary text in chunks as it is generated (for progressive dashboard display)
+
+    캐시 적중이나 기본 요약은 한 조각으로 반환되며, 첫 조각 전에 API가
+    실패하면 기본 요약으로 대체됨. 같은 입력이 이미 호출 중이면 그 호출에
+    합류해 완료된 요약을 한 조각으로 받음 (스트림을 일찍 닫아도 공유 호출은
+    계속되어 결과가 캐시됨)
+    Cache hits and basic summaries arrive as a single chunk; if the API fails
+    before the first chunk, the basic summary is yielded instead. An identical
+    input already in flight is joined and its finished summary arrives as one
+    chunk (closing the stream early leaves the shared call running so its result is cached)
+    """
+    immediate, request = _resolve_summary(logs, current_status)
+    if immediate is not None:
+        yield immediate["summary"]
+        return
+
+    task = _IN_FLIGHT.get(request["cache_key"])
+    if task is not None:
+        yield (await asyncio.shield(task))["summary"]
+        return
+
+    chunks: asyncio.Queue = asyncio.Queue()
+    task = _start_call(request, chunks)
+    task.add_done_callback(lambda _: chunks.put_nowait(None))
+
+    started = False
+    while (chunk := await chunks.get()) is not None:
+        started = True
+        yield chunk
+
+    result = task.result()
+    if not started:
+        yield result["summary"]
+    elif "ai_error" in result:
+        raise RuntimeError(result["ai_error"])
+
+
+def _resolve_summary(
+    logs: list[dict], current_status: dict
+) -> tuple[Optional[dict], Optional[dict]]:
+    """
+    API 호출 없이 응답 가능한지 판단 / Decide whether a request can be answered without the API
+
+    Returns:
+        (즉시 응답, None) 또는 (None, API 요청 정보)
+        (immediate result, None) or (None, API request info)
+    """
     if not ANTHROPIC_API_KEY:
         # API 키 없으면 기본 요약 반환
         # Return basic summary if no API key
-        return _generate_basic_summary(logs, current_status)
+        return _generate_basic_summary(logs, current_status), None
 
     # 최근 24시간 로그만 분석
     # Analyze only last 24 hours of logs
-    cutoff = datetime.now() - timedelta(hours=24)
-    recent_logs = [
-        log for log in logs
-        if datetime.fromisoformat(log["time"]) > cutoff
-    ]
+    # 기록은 시간순으로 추가되므로 이진 탐색으로 시작 위치만 찾음
+    # Logs are appended in time order, so binary-search the start index
+    cutoff_iso = (datetime.now() - timedelta(hours=24)).isoformat()
+    recent_logs = logs[bisect.bisect_right(logs, cutoff_iso, key=_log_time):]
 
-    # AI 프롬프트 구성
-    # Construct AI prompt
-    prompt = _build_analysis_prompt(recent_logs, current_status)
+    # 경고 없는 정상 상태는 AI 호출 없이 기본 요약으로 충분
+    # A normal state with no warnings needs no AI call — the basic summary suffices
+    complexity = _classify_complexity(recent_logs, current_status)
+    if complexity == "trivial":
+        basic = _generate_basic_summary(logs, current_status)
+        basic["routed"] = "basic"
+        return basic, None
 
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                ANTHROPIC_API_URL,
-                headers={
-                    "x-api-key": ANTHROPIC_API_KEY,
-                    "anthropic-version": "2023-06-01",
-                    "content-type": "application/json",
-                },
-                json={
-                    "model": AI_MODEL,
-                    "max_tokens": 1000,
-                    "system": _get_system_prompt(),
-                    "messages": [
-                        {"role": "user", "content": prompt}
-                    ],
-                },
-            )
-            response.raise_for_status()
-            data = response.json()
-            ai_text = data["content"][0]["text"]
+    # 같은 입력이면 API 호출 없이 캐시된 요약 반환
+    # Return the cached summary for identical input without calling the API
+    cache_key = _cache_key(recent_logs, current_status)
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        return cached, None
+
+    # 한두 건만 다른 거의 같은 상태면 직전 요약 재사용
+    # Reuse a recent summary when the state differs only trivially
+    fingerprint = _fingerprint(recent_logs, current_status)
+    cached = _semantic_get(fingerprint)
+    if cached is not None:
+        return cached, None
 
-            return {
-                "ai_powered": True,
-                "model": AI_MODEL,
-                "summary": ai_text,
-                "analyzed_logs_count": len(recent_logs),
-                "analysis_time": datetime.now().isoformat(),
-            }
+    # API 장애가 이어지면 30초 타임아웃을 기다리지 않고 바로 기본 요약
+    # While the API keeps failing, return the basic summary without waiting on timeouts
+    if not _circuit_allows():
+        return _generate_basic_summary(logs, current_status) | {"circuit_open": True}, None
+
+    return None, {
+        "logs": logs,
+        "recent_logs": recent_logs,
+        "current_status": current_status,
+        "complexity": complexity,
+        "cache_key": cache_key,
+        "fingerprint": fingerprint,
+    }
+
+
+async def _request_summary(request: dict, chunks: Optional[asyncio.Queue] = None) -> dict:
+    """
+    Claude API 호출 후 전체 요약 반환 / Call the Claude API and return the full summary
+
+    chunks가 주어지면 텍스트 조각을 생성되는 대로 넣음
+    When chunks is given, text chunks are put on it as they arrive
+    """
+    result: dict = {}
+    try:
+        async for chunk in _stream_summary(request, result):
+            if chunks is not None:
+                chunks.put_nowait(chunk)
+        return result
 
     except Exception as e:
         # AI 분석 실패 시 기본 요약으로 폴백
         # Fall back to basic summary if AI analysis fails
-        basic = _generate_basic_summary(logs, current_status)
+        basic = _generate_basic_summary(request["logs"], request["current_status"])
         basic["ai_error"] = str(e)
         return basic
 
 
-def _get_system_prompt() -> str:
-    """AI 시스템 프롬프트 / AI system prompt"""
-    return """당신은 욕창 방지 로봇 시스템을 모니터링하는 의료 어시스턴트입니다.
+async def _stream_summary(request: dict, result: dict) -> AsyncIterator[str]:
+    """
+    Claude API 스트리밍 호출 / Streaming Claude API call
+
+    텍스트 조각을 생성되는 대로 반환하고, 완료되면 result를 채워 캐시에 저장
+    Yields text chunks as they arrive; on completion fills result and caches it
+    """
+    recent_logs = request["recent_logs"]
+    complexity = request["complexity"]
+
+    # AI 프롬프트 구성
+    # Construct AI prompt
+    prompt = _build_analysis_prompt(recent_logs, request["current_status"])
+
+    # 단순한 경우는 빠른 모델 + 짧은 프롬프트, 이상 상황만 전체 모델 사용
+    # Simple cases use the fast model with a short prompt; only anomalies get the full model
+    simple = complexity == "simple"
+    model = AI_MODEL_FAST if simple else AI_MODEL
+
+    system_text, max_tokens = _select_system_prompt(complexity, recent_logs)
+    system = _get_system_prompt(system_text)
+
+    # 대략적인 입력 토큰 추정 (문자 4개 ≈ 1토큰) / Rough input token estimate (~4 chars/token)
+    prompt_chars = sum(len(block["text"]) for block in prompt)
+    system_chars = sum(len(block["text"]) for block in system)
+
+    try:
+        await _LIMITER.acquire((prompt_chars + system_chars) // 4 + max_tokens)
+
+        parts = []
+        usage: dict = {}
+        async with _get_client().stream(
+            "POST",
+            ANTHROPIC_API_URL,
+            headers={"accept": "text/event-stream"},
+            json={
+                "model": model,
+                "max_tokens": max_tokens,
+                "stream": True,
+                "system": system,
+                "messages": [
+                    {"role": "user", "content": prompt}
+                ],
+            },
+        ) as response:
+            if response.status_code == 429:
+                # 서버가 알려준 대기 시간을 속도 제한기에 반영
+                # Feed the server-provided back-off into the limiter
+                _LIMITER.penalize(_retry_after_seconds(response.headers.get("retry-after")))
+            response.raise_for_status()
+
+            # SSE 프레임: "data: {...}" 줄만 처리 / SSE frames: only "data: {...}" lines matter
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                event = _loads(line[5:])
+                kind = event.get("type")
+                if kind == "content_block_delta" and event["delta"].get("type") == "text_delta":
+                    text = event["delta"]["text"]
+                    parts.append(text)
+                    yield text
+                elif kind == "message_start":
+                    usage.update(event["message"].get("usage", {}))
+                elif kind == "message_delta":
+                    usage.update(event.get("usage", {}))
+                elif kind == "error":
+                    raise RuntimeError(event["error"].get("message", "stream error"))
+
+        result.update({
+            "ai_powered": True,
+            "model": model,
+            "routed": "fast" if simple else "full",
+            "summary": "".join(parts),
+            "analyzed_logs_count": len(recent_logs),
+            "cache_read_input_tokens": usage.get("cache_read_input_tokens", 0),
+            "estimated_prompt_tokens": prompt_chars // 4,
+            "rate_limit_tokens_remaining": _LIMITER.tokens_remaining,
+            "analysis_time": datetime.now().isoformat(),
+        })
+        _cache_put(request["cache_key"], result)
+        _SEMANTIC_CACHE.append((request["fingerprint"], result, time.monotonic()))
+        _CB.update(failures=0, probing=False)
+
+    except (asyncio.CancelledError, GeneratorExit):
+        _CB["probing"] = False  # 취소된 시험 호출은 다음 호출이 대신함 / Let another call probe
+        raise
+
+    except Exception:
+        _CB.update(failures=_CB["failures"] + 1, opened_at=time.monotonic(), probing=False)
+        raise
+
+
+async def _enqueue_summary(request: dict) -> dict:
+    """
+    진행 중인 호출이 없으면 바로 호출, 있으면 대기 창에 모아 처리
+    Call right away when nothing is in progress; otherwise collect within the window
+
+    같은 입력이 이미 호출 중이면 새로 호출하지 않고 그 결과를 공유
+    An identical input already in flight shares that call's result instead of calling again
+    """
+    global _FLUSH_TASK
+    if request["cache_key"] in _IN_FLIGHT or not (_IN_FLIGHT or _PENDING):
+        return dict(await asyncio.shield(_start_call(request)))
+
+    future = asyncio.get_running_loop().create_future()
+    _PENDING.append((request, future))
+    if _FLUSH_TASK is None or _FLUSH_TASK.done():
+        _FLUSH_TASK = asyncio.create_task(_flush_pending())
+    return await future
+
+
+def _start_call(request: dict, chunks: Optional[asyncio.Queue] = None) -> asyncio.Task:
+    """같은 캐시 키의 진행 중 호출을 재사용하거나 새로 시작 / Reuse the in-flight call for this key or start one"""
+    key = request["cache_key"]
+    task = _IN_FLIGHT.get(key)
+    if task is None:
+        task = asyncio.create_task(_request_summary(request, chunks))
+        _IN_FLIGHT[key] = task
+        task.add_done_callback(lambda _: _IN_FLIGHT.pop(key, None))
+    return task
+
+
+async def _flush_pending():
+    """
+    대기열이 빌 때까지 대기 창마다 모인 요청을 호출에 연결
+    Until the queue is empty, attach each window's requests to calls
+
+    호출 완료를 기다리지 않으므로 호출 중 들어온 요청도 다음 창에서 처리됨
+    Calls are not awaited here, so requests arriving mid-call are picked up by the next window
+    """
+    while _PENDING:
+        await asyncio.sleep(_BATCH_WINDOW)
+        pending = _PENDING[:]
+        _PENDING.clear()
+        for request, future in pending:
+            _start_call(request).add_done_callback(
+                lambda task, future=future: _resolve_future(future, task)
+            )
+
+
+def _resolve_future(future: asyncio.Future, task: asyncio.Task):
+    """호출 결과를 대기 중인 요청에 전달 / Hand a call's outcome to a waiting request"""
+    if future.done():
+        return  # 요청 측이 취소됨 / Caller was cancelled
+    if task.cancelled():
+        future.cancel()
+    elif task.exception() is not None:
+        future.set_exception(task.exception())
+    else:
+        future.set_result(dict(task.result()))
+
+
+def _circuit_allows() -> bool:
+    """
+    회로 차단기 상태 확인 / Check whether the circuit breaker allows a call
+
+    닫힘: 항상 허용, 열림: 대기 시간 동안 차단,
+    반개방: 대기 후 시험 호출 한 건만 허용 (성공 시 닫힘, 실패 시 다시 열림)
+    Closed: always allow. Open: block during cooldown.
+    Half-open: after cooldown allow a single probe (success closes, failure reopens)
+    """
+    if _CB["failures"] < _CB_THRESHOLD:
+        return True
+    if time.monotonic() - _CB["opened_at"] < _CB_COOLDOWN or _CB["probing"]:
+        return False
+    _CB["probing"] = True
+    return True
+
+
+def _dumps_bytes(obj, sort_keys: bool = False) -> bytes:
+    """압축 JSON (UTF-8 바이트) / Compact JSON as UTF-8 bytes"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(obj, option=option)
+    return json.dumps(
+        obj, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys
+    ).encode()
+
+
+def _dumps(obj) -> str:
+    """압축 JSON 문자열 / Compact JSON string"""
+    return _dumps_bytes(obj).decode()
+
+
+def _loads(data: bytes):
+    """JSON 파싱 / Parse JSON"""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _hours_since_rotation(
+    current_status: dict, now: Optional[datetime] = None
+) -> Optional[float]:
+    """마지막 자세 변환 후 경과 시간 / Hours since the last rotation"""
+    last_rotation = current_status.get("last_rotation_time")
+    if not last_rotation:
+        return None
+    now = now or datetime.now()
+    return (now - datetime.fromisoformat(last_rotation)).total_seconds() / 3600
+
+
+def _classify_complexity(
+    logs: list[dict], current_status: dict
+) -> Literal["trivial", "simple", "complex"]:
+    """
+    요약 요청 복잡도 분류 / Classify how much analysis a summary request needs
+
+    - trivial: 경고 없음, 2시간 이내 변환, 기록 20건 이하 → 기본 요약
+    - complex: 치명적 오류, 수동 확인 필요, 경고 다수, 4시간 이상 미변환 → 전체 모델
+    - simple: 그 외 → 빠른 모델
+    """
+    warnings = [log for log in logs if log.get("level") in ("warning", "critical")]
+    hours_since = _hours_since_rotation(current_status)
+
+    if not warnings and (hours_since is None or hours_since < 2) and len(logs) <= 20:
+        return "trivial"
+
+    if (
+        any(log.get("level") == "critical" or log.get("requires_manual") for log in warnings)
+        or len(warnings) >= 3
+        or (hours_since is not None and hours_since >= 4)
+    ):
+        return "complex"
+
+    return "simple"
+
+
+def _cache_key(logs: list[dict], current_status: dict) -> str:
+    """로그+상태의 정규화 JSON 해시 / Hash of canonical logs+status JSON"""
+    canonical = _dumps_bytes({"l": logs, "s": current_status}, sort_keys=True)
+    return hashlib.blake2b(canonical, digest_size=16).hexdigest()
+
+
+def _cache_get(key: str) -> Optional[dict]:
+    """만료 항목 정리 후 캐시 조회 / Purge expired entries, then look up key"""
+    now = time.monotonic()
+    # 삽입 순서 = 저장 시각 순서이므로 앞에서부터 만료 정리
+    # Insertion order is storage-time order, so expire from the front
+    while _SUMMARY_CACHE:
+        oldest_key, (stored_at, _) = next(iter(_SUMMARY_CACHE.items()))
+        if now - stored_at < _CACHE_TTL:
+            break
+        del _SUMMARY_CACHE[oldest_key]
+
+    entry = _SUMMARY_CACHE.get(key)
+    if entry is None:
+        return None
+    return {**entry[1], "cache_hit": True}
+
+
+def _cache_put(key: str, result: dict):
+    """성공한 AI 요약 저장 / Store a successful AI summary"""
+    _SUMMARY_CACHE.pop(key, None)
+    _SUMMARY_CACHE[key] = (time.monotonic(), result)
+    while len(_SUMMARY_CACHE) > _CACHE_MAX:
+        _SUMMARY_CACHE.popitem(last=False)
+
+
+def _fingerprint(logs: list[dict], current_status: dict) -> tuple[float, ...]:
+    """
+    요청 상태를 작은 특징 벡터로 요약 / Summarize request state as a small feature vector
+
+    경고·자세·일시정지·경과 시간 구간은 하나만 바뀌어도 임계값을 넘도록
+    가중치를 두어, 의미 있는 변화는 절대 근사 일치로 처리되지 않음
+    Warnings, position, pause state and elapsed-time bucket are weighted so that
+    any single change exceeds the threshold and is never treated as a near match
+    """
+    weight = 2 * _SEMANTIC_TAU
+    minor = 0.5  # 정상 기록 한 건 추가는 근사 일치 허용 / One extra info log is tolerated
+
+    def level_counts(entries: list[dict]) -> tuple[float, ...]:
+        info = warning = critical = manual = 0
+        for log in entries:
+            level = log.get("level")
+            if level == "info":
+                info += 1
+            elif level == "warning":
+                warning += 1
+            elif level == "critical":
+                critical += 1
+            if log.get("requires_manual"):
+                manual += 1
+        return (info * minor, warning * weight, critical * weight, manual * weight)
+
+    hours_since = _hours_since_rotation(current_status)
+    if hours_since is not None:
+        hours_bucket = bisect.bisect_right(_HOURS_BUCKETS, hours_since)
+    else:
+        hours_bucket = len(_HOURS_BUCKETS) + 1
+
+    position = current_status.get("current_position")
+    return (
+        *level_counts(logs),
+        *level_counts(logs[-20:]),
+        *(weight * (position == p) for p in _POSITIONS),
+        hours_bucket * weight,
+        current_status.get("total_rotations", 0) * minor,
+        weight * bool(current_status.get("is_paused")),
+        weight * bool(current_status.get("is_running")),
+    )
+
+
+def _semantic_get(fingerprint: tuple[float, ...]) -> Optional[dict]:
+    """가장 가까운 최근 요약 조회 / Look up the nearest recent summary"""
+    now = time.monotonic()
+    best, best_distance = None, _SEMANTIC_TAU
+    for cached_fp, result, stored_at in _SEMANTIC_CACHE:
+        if now - stored_at >= _SEMANTIC_TTL:
+            continue
+        distance = sum(abs(a - b) for a, b in zip(fingerprint, cached_fp))
+        if distance < best_distance:
+            best, best_distance = result, distance
+    if best is None:
+        return None
+    return {**best, "semantic_hit": True}
+
+
+# AI 시스템 프롬프트 / AI system prompt
+SYSTEM_PROMPT = """당신은 욕창 방지 로봇 시스템을 모니터링하는 의료 어시스턴트입니다.
 주어진 자세 변환 기록과 현재 상태를 분석하여 보호자와 의료진에게 유용한 요약을 제공하세요.
 
 다음 사항을 포함하여 분석하세요:
@@ -103,22 +704,113 @@ Analyze the given position change logs and current status to provide useful summ
 Always respond in Korean. Do not make medical decisions, only report on robot operation status."""
 
 
-def _build_analysis_prompt(logs: list[dict], current_status: dict) -> str:
-    """분석 프롬프트 구성 / Build analysis prompt"""
-    logs_summary = json.dumps(logs[-20:], ensure_ascii=False, indent=2)  # 최근 20건
-    status_summary = json.dumps(current_status, ensure_ascii=False, indent=2)
+# 단순 요약용 축약 프롬프트 / Trimmed prompt for simple summaries
+SIMPLE_SYSTEM_PROMPT = """당신은 욕창 방지 로봇의 운영 기록을 요약하는 어시스턴트입니다.
+주어진 기록과 현재 상태를 보고 보호자용 상태 요약을 한국어로 간결하게 작성하세요.
+의학적 결정은 내리지 말고, 로봇 시스템 운영 현황만 보고하세요."""
+
+
+# 기록이 적고 경고가 없을 때의 최소 프롬프트 / Minimal prompt for short, warning-free logs
+MINIMAL_SYSTEM_PROMPT = "욕창 방지 로봇 상태를 한국어로 3-5줄 요약하세요. 의학적 결정 금지."
+
+
+def _select_system_prompt(complexity: str, logs: list[dict]) -> tuple[str, int]:
+    """
+    요청에 맞는 시스템 프롬프트와 최대 출력 토큰 선택
+    Select the system prompt and max output tokens for a request
+    """
+    if complexity == "complex":
+        return SYSTEM_PROMPT, 1000
+    if len(logs) < 5 and not any(log.get("level") in ("warning", "critical") for log in logs):
+        return MINIMAL_SYSTEM_PROMPT, 300
+    return SIMPLE_SYSTEM_PROMPT, 1000
+
+
+def _get_system_prompt(text: str = SYSTEM_PROMPT) -> list[dict]:
+    """
+    AI 시스템 프롬프트 — 매 호출 동일하므로 프롬프트 캐시에 저장
+    AI system prompt — identical on every call, so it is marked for prompt caching
+    """
+    return [
+        {"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}
+    ]
 
-    return f"""다음은 지난 24시간 동안의 욕창 방지 로봇 작동 기록입니다.
+
+def _build_analysis_prompt(logs: list[dict], current_status: dict) -> list[dict]:
+    """
+    분석 프롬프트 구성 / Build analysis prompt
+
+    변하지 않는 앞부분(필드 설명, 오래된 기록)은 캐시 블록으로,
+    최근 기록과 현재 상태는 매번 새로 보내는 블록으로 분리
+    The stable prefix (field reference, older logs) is a cached block;
+    the latest logs and current status go in a separate uncached block
+    """
+    window = logs[-20:]  # 최근 20건 (시간순) / Last 20, oldest first
+    stable_cutoff_iso = (datetime.now() - STABLE_LOG_AGE).isoformat()
+    split = bisect.bisect_right(window, stable_cutoff_iso, key=_log_time)
+    older, latest = window[:split], window[split:]
+
+    older_summary = _compress_logs(older)
+    latest_summary = _compress_logs(latest)
+    status_summary = _dumps(current_status)
+
+    stable_context = f"""다음은 지난 24시간 동안의 욕창 방지 로봇 작동 기록입니다.
+
+## 상태 필드 설명 / Status Field Reference:
+- current_position: 현재 자세 (supine / left_lateral / right_lateral)
+- last_rotation_time / next_rotation_time: 마지막 / 다음 자세 변환 시각
+- total_rotations: 누적 자세 변환 횟수 / Total rotations
+- is_paused: 자동 스케줄 일시정지 여부 / Whether the schedule is paused
+
+## 이전 자세 변환 기록 / Earlier Position Change Logs:
+{older_summary}"""
+
+    volatile_context = f"""## 최근 10분 기록 / Logs from the last 10 minutes:
+{latest_summary}
 
 ## 현재 시스템 상태 / Current System Status:
 {status_summary}
 
-## 최근 자세 변환 기록 / Recent Position Change Logs (최근 20건):
-{logs_summary}
-
 위 데이터를 분석하여 보호자에게 제공할 간결한 상태 요약을 작성해주세요.
 총 자세 변환 횟수, 이상 여부, 주의 사항 등을 포함하세요."""
 
+    return [
+        {"type": "text", "text": stable_context, "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": volatile_context},
+    ]
+
+
+def _compress_logs(logs: list[dict]) -> str:
+    """
+    프롬프트용 로그 압축 / Compress logs for the prompt
+
+    연속된 정상(info) 기록은 한 줄로 묶고, 경고/치명 기록은 그대로 유지
+    Runs of consecutive info logs collapse into one line; warnings/criticals stay verbatim
+    """
+    if not logs:
+        return "(없음 / none)"
+
+    lines = []
+    run: list[dict] = []
+
+    def flush_run():
+        if len(run) == 1:
+            lines.append(_dumps(run[0]))
+        elif run:
+            start, end = run[0]["time"][11:16], run[-1]["time"][11:16]
+            lines.append(f"[info ×{len(run)}] {start}–{end} 자세 변환 정상 완료 / rotations normal")
+        run.clear()
+
+    for log in logs:
+        if log.get("level") == "info":
+            run.append(log)
+            continue
+        flush_run()
+        lines.append(_dumps(log))
+    flush_run()
+
+    return "\n".join(lines)
+
 
 def _generate_basic_summary(logs: list[dict], current_status: dict) -> dict:
     """
@@ -131,13 +823,11 @@ def _generate_basic_summary(logs: list[dict], current_status: dict) -> dict:
 
     # 욕창 위험 평가 (단순 규칙 기반)
     # Simple rule-based pressure ulcer risk assessment
-    last_rotation = current_status.get("last_rotation_time")
-    if last_rotation:
-        last_dt = datetime.fromisoformat(last_rotation)
-        hours_since = (datetime.now() - last_dt).total_seconds() / 3600
+    now = datetime.now()
+    hours_since = _hours_since_rotation(current_status, now)
+    if hours_since is not None:
         risk_level = "낮음" if hours_since < 2 else ("중간" if hours_since < 4 else "높음")
     else:
-        hours_since = None
         risk_level = "알 수 없음"
 
     summary_text = f"""📊 CareBot 운영 현황 요약
@@ -161,5 +851,5 @@ def _generate_basic_summary(logs: list[dict], current_status: dict) -> dict:
             "risk_level": risk_level,
             "hours_since_last_rotation": hours_since,
         },
-        "analysis_time": datetime.now().isoformat(),
+        "analysis_time": now.isoformat(),
     }
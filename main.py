@@ -8,12 +8,15 @@ CareBot Core — Main control module for pressure ulcer prevention robot
 """
 
 import asyncio
+import atexit
 import logging
+import logging.handlers
+import queue
 import signal
 import sys
 import os
-from datetime import datetime
-from enum import Enum
+from datetime import datetime, timedelta
+from enum import IntEnum
 
 # 시뮬레이션 모드 여부 확인 (하드웨어 없을 때 테스트용)
 # Check simulation mode (for testing without hardware)
@@ -21,20 +24,31 @@ SIMULATION_MODE = os.getenv("SIMULATION_MODE", "false").lower() == "true"
 
 if not SIMULATION_MODE:
     try:
-        import RPi.GPIO as GPIO
+        import lgpio
     except ImportError:
-        print("⚠️  RPi.GPIO를 불러올 수 없습니다. SIMULATION_MODE=true 로 실행하세요.")
-        print("⚠️  RPi.GPIO not available. Run with SIMULATION_MODE=true")
+        print("⚠️  lgpio를 불러올 수 없습니다. SIMULATION_MODE=true 로 실행하세요.")
+        print("⚠️  lgpio not available. Run with SIMULATION_MODE=true")
         sys.exit(1)
 
-# 로깅 설정 / Logging setup
+# 로깅 설정 — 파일/콘솔 출력은 백그라운드 스레드에서 처리해 이벤트 루프를 막지 않음
+# Logging setup — file/console output runs on a background thread so the event loop never blocks
+_log_formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+_log_handlers = [
+    logging.FileHandler("logs/carebot.log", encoding="utf-8"),
+    logging.StreamHandler(sys.stdout),
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+
+_log_queue: queue.Queue = queue.Queue(-1)
+_log_listener = logging.handlers.QueueListener(_log_queue, *_log_handlers)
+_log_listener.start()
+atexit.register(_log_listener.stop)  # 종료 시 남은 로그 기록 / Flush remaining records on exit
+
 logging.basicConfig(
     level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    handlers=[
-        logging.FileHandler("logs/carebot.log", encoding="utf-8"),
-        logging.StreamHandler(sys.stdout),
-    ],
+    format="%(message)s",  # 최종 포맷은 리스너 쪽 핸들러가 적용 / Listener handlers apply the final format
+    handlers=[logging.handlers.QueueHandler(_log_queue)],
 )
 logger = logging.getLogger("carebot.core")
 
@@ -42,10 +56,15 @@ logger = logging.getLogger("carebot.core")
 # ─────────────────────────────────────────────
 # 자세 정의 / Patient Position Definitions
 # ─────────────────────────────────────────────
-class Position(str, Enum):
-    SUPINE = "supine"           # 앙와위 (등 대고 누운 자세)
-    LEFT_LATERAL = "left_lateral"   # 좌측와위 (왼쪽으로 기울임)
-    RIGHT_LATERAL = "right_lateral" # 우측와위 (오른쪽으로 기울임)
+# 정수 값은 아래 자세별 튜플의 인덱스 / Integer values index the per-position tuples below
+class Position(IntEnum):
+    SUPINE = 0          # 앙와위 (등 대고 누운 자세)
+    LEFT_LATERAL = 1    # 좌측와위 (왼쪽으로 기울임)
+    RIGHT_LATERAL = 2   # 우측와위 (오른쪽으로 기울임)
+
+
+# API/로그용 자세 식별 문자열 / Position identifiers for the API and logs
+POSITION_STR = ("supine", "left_lateral", "right_lateral")
 
 
 # 자세 순환 순서 (권장: 앙와위 → 좌측 → 앙와위 → 우측)
@@ -59,40 +78,51 @@ POSITION_ROTATION = [
 
 # 각 자세의 액추에이터 목표값 (0~100%)
 # Actuator target values for each position (0~100%)
-POSITION_TARGETS = {
-    Position.SUPINE: {
+POSITION_TARGETS = (
+    {   # Position.SUPINE
         "head_left": 0,    # 좌측 상체 패널
         "head_right": 0,   # 우측 상체 패널
         "foot_left": 0,    # 좌측 하체 패널
         "foot_right": 0,   # 우측 하체 패널
     },
-    Position.LEFT_LATERAL: {
+    {   # Position.LEFT_LATERAL
         "head_left": 60,   # 좌측으로 30도 기울기
         "head_right": 10,
         "foot_left": 60,
         "foot_right": 10,
     },
-    Position.RIGHT_LATERAL: {
+    {   # Position.RIGHT_LATERAL
         "head_left": 10,   # 우측으로 30도 기울기
         "head_right": 60,
         "foot_left": 10,
         "foot_right": 60,
     },
-}
+)
 
 # 한국어 자세 이름 (로그 및 UI 표시용)
 # Korean position names for logs and UI
-POSITION_NAMES_KO = {
-    Position.SUPINE: "앙와위 (등 대고 누운 자세)",
-    Position.LEFT_LATERAL: "좌측와위 (왼쪽 기울임 30°)",
-    Position.RIGHT_LATERAL: "우측와위 (오른쪽 기울임 30°)",
-}
+POSITION_NAMES_KO = (
+    "앙와위 (등 대고 누운 자세)",    # Position.SUPINE
+    "좌측와위 (왼쪽 기울임 30°)",    # Position.LEFT_LATERAL
+    "우측와위 (오른쪽 기울임 30°)",  # Position.RIGHT_LATERAL
+)
 
 
 # ─────────────────────────────────────────────
 # GPIO 핀 설정 / GPIO Pin Configuration
 # ─────────────────────────────────────────────
 class PinConfig:
+    # GPIO 칩 번호 (Pi 4 이하: 0, Pi 5 구형 커널: 4)
+    # GPIO chip number (Pi 4 and earlier: 0, Pi 5 on older kernels: 4)
+    GPIO_CHIP = int(os.getenv("GPIO_CHIP", "0"))
+
+    # 액추에이터 PWM 주파수 (Hz) / Actuator PWM frequency (Hz)
+    PWM_FREQUENCY = 100
+
+    # 이동 방향별 (extend, retract) 출력값: -1 수축, 0 정지, 1 확장
+    # (extend, retract) output levels per direction: -1 retract, 0 stop, 1 extend
+    DIR_OUTPUTS = {-1: (0, 1), 0: (0, 0), 1: (1, 0)}
+
     # 액추에이터 제어 핀 (L298N 드라이버 연결)
     # Actuator control pins (connected to L298N driver)
     ACTUATORS = {
@@ -120,6 +150,11 @@ class PinConfig:
 # ─────────────────────────────────────────────
 # 액추에이터 컨트롤러 / Actuator Controller
 # ─────────────────────────────────────────────
+# 단계 지연이 이 값(초)을 넘으면 이벤트 루프 혼잡으로 보고 경고
+# Step lateness beyond this many seconds is logged as event-loop contention
+STEP_SLIP_WARN = 0.05
+
+
 class ActuatorController:
     """
     리니어 액추에이터 제어 클래스
@@ -129,7 +164,13 @@ class ActuatorController:
     def __init__(self, simulation: bool = False):
         self.simulation = simulation
         self.current_positions = {k: 0 for k in PinConfig.ACTUATORS}
-        self.pwm_objects = {}
+        self._chip = None  # lgpio 칩 핸들 / lgpio chip handle
+        self._estop_callback = None
+
+        # 마지막으로 출력한 방향/듀티 — 바뀔 때만 GPIO에 씀
+        # Last written direction/duty — GPIO is written only on change
+        self._last_direction = {k: 0 for k in PinConfig.ACTUATORS}
+        self._last_duty = {k: 0 for k in PinConfig.ACTUATORS}
 
         if not simulation:
             self._setup_gpio()
@@ -138,33 +179,36 @@ class ActuatorController:
 
     def _setup_gpio(self):
         """GPIO 핀 초기화 / Initialize GPIO pins"""
-        GPIO.setmode(GPIO.BCM)
-        GPIO.setwarnings(False)
-
-        for name, pins in PinConfig.ACTUATORS.items():
-            GPIO.setup(pins["extend"], GPIO.OUT)
-            GPIO.setup(pins["retract"], GPIO.OUT)
-            GPIO.setup(pins["pwm"], GPIO.OUT)
-
-            # PWM 주파수 100Hz로 설정
-            # Set PWM frequency to 100Hz
-            pwm = GPIO.PWM(pins["pwm"], 100)
-            pwm.start(0)
-            self.pwm_objects[name] = pwm
-
-        # 긴급 정지 버튼 입력 설정
-        # Setup emergency stop button input
-        GPIO.setup(PinConfig.EMERGENCY_STOP_PIN, GPIO.IN, pull_up_down=GPIO.PUD_UP)
-        GPIO.add_event_detect(
+        self._chip = lgpio.gpiochip_open(PinConfig.GPIO_CHIP)
+
+        for pins in PinConfig.ACTUATORS.values():
+            lgpio.gpio_claim_output(self._chip, pins["extend"], 0)
+            lgpio.gpio_claim_output(self._chip, pins["retract"], 0)
+            lgpio.gpio_claim_output(self._chip, pins["pwm"], 0)
+
+            # PWM은 lgpio C 스레드에서 생성 (파이썬 인터프리터 부하 없음)
+            # PWM is generated by lgpio's C thread (no Python interpreter load)
+            lgpio.tx_pwm(self._chip, pins["pwm"], PinConfig.PWM_FREQUENCY, 0)
+
+        # 긴급 정지 버튼 입력 설정 (풀업, 하강 에지, 300ms 디바운스)
+        # Setup emergency stop button input (pull-up, falling edge, 300ms debounce)
+        lgpio.gpio_claim_alert(
+            self._chip,
+            PinConfig.EMERGENCY_STOP_PIN,
+            lgpio.FALLING_EDGE,
+            lgpio.SET_PULL_UP,
+        )
+        lgpio.gpio_set_debounce_micros(self._chip, PinConfig.EMERGENCY_STOP_PIN, 300_000)
+        self._estop_callback = lgpio.callback(
+            self._chip,
             PinConfig.EMERGENCY_STOP_PIN,
-            GPIO.FALLING,
-            callback=self._emergency_stop_callback,
-            bouncetime=300,
+            lgpio.FALLING_EDGE,
+            self._emergency_stop_callback,
         )
 
         logger.info("✅ GPIO 초기화 완료 / GPIO initialization complete")
 
-    def _emergency_stop_callback(self, channel):
+    def _emergency_stop_callback(self, chip, gpio, level, tick):
         """긴급 정지 버튼 콜백 / Emergency stop button callback"""
         logger.critical("🚨 긴급 정지 버튼 눌림! 모든 액추에이터 즉시 정지!")
         logger.critical("🚨 EMERGENCY STOP PRESSED! All actuators halted immediately!")
@@ -174,10 +218,11 @@ class ActuatorController:
         """모든 액추에이터 즉시 정지 / Halt all actuators immediately"""
         if not self.simulation:
             for name, pins in PinConfig.ACTUATORS.items():
-                GPIO.output(pins["extend"], GPIO.LOW)
-                GPIO.output(pins["retract"], GPIO.LOW)
-                if name in self.pwm_objects:
-                    self.pwm_objects[name].ChangeDutyCycle(0)
+                lgpio.gpio_write(self._chip, pins["extend"], 0)
+                lgpio.gpio_write(self._chip, pins["retract"], 0)
+                lgpio.tx_pwm(self._chip, pins["pwm"], PinConfig.PWM_FREQUENCY, 0)
+                self._last_direction[name] = 0
+                self._last_duty[name] = 0
         logger.critical("⛔ 긴급 정지 완료 / Emergency stop completed")
 
     async def move_to_position(
@@ -199,20 +244,46 @@ class ActuatorController:
         """
         logger.info(f"🔄 자세 변환 시작: {target_name} / Position change starting: {target_name}")
 
+        # 시작 위치를 고정해 두고 보간 (시뮬레이션/하드웨어 동일한 기준)
+        # 액추에이터별 값을 같은 순서의 튜플로 두어 단계마다 dict 조회 없이 계산
+        # Interpolate from a fixed start snapshot (same reference in simulation and hardware),
+        # with per-actuator values held in parallel tuples so steps need no dict lookups
+        names = tuple(target_values)
+        starts = tuple(self.current_positions[name] for name in names)
+        deltas = tuple(target_values[name] - start for name, start in zip(names, starts))
+        last_written = [round(start) for start in starts]
+
+        # 단계마다 고정 시각까지 대기해 GPIO/로깅 지연이 누적되지 않게 함
+        # Sleep until fixed per-step deadlines so GPIO/logging jitter does not accumulate
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        max_slip = 0.0
+
         for step in range(1, steps + 1):
             ratio = step / steps  # 0.0 → 1.0 선형 보간
+            new_positions = [start + delta * ratio for start, delta in zip(starts, deltas)]
 
-            for actuator_name, target_pct in target_values.items():
-                current = self.current_positions[actuator_name]
-                new_pct = current + (target_pct - current) * ratio
-
-                if not self.simulation:
-                    self._set_actuator(actuator_name, new_pct)
-                else:
-                    # 시뮬레이션: 값만 업데이트
-                    self.current_positions[actuator_name] = new_pct
-
-            await asyncio.sleep(step_delay)
+            if not self.simulation:
+                # 정수 위치가 바뀔 때만 GPIO 출력 (중복 쓰기 방지)
+                # Write GPIO only when the integer position changes (skip redundant writes)
+                for i, new_pct in enumerate(new_positions):
+                    quantized = round(new_pct)
+                    if quantized != last_written[i]:
+                        self._set_actuator(names[i], quantized)
+                        last_written[i] = quantized
+            else:
+                # 시뮬레이션: 값만 업데이트
+                self.current_positions.update(zip(names, new_positions))
+
+            remaining = t0 + step * step_delay - loop.time()
+            max_slip = max(max_slip, -remaining)
+            await asyncio.sleep(max(0.0, remaining))
+
+        if max_slip > STEP_SLIP_WARN:
+            logger.warning(
+                f"⏱️ 자세 변환 단계 지연 최대 {max_slip * 1000:.0f}ms (이벤트 루프 혼잡) / "
+                f"Step slippage up to {max_slip * 1000:.0f}ms (event-loop contention)"
+            )
 
         # 목표 위치로 최종 설정
         # Final set to target position
@@ -231,31 +302,31 @@ class ActuatorController:
         pins = PinConfig.ACTUATORS[name]
         current = self.current_positions.get(name, 0)
 
-        if percent > current:
-            # 확장 (extend)
-            GPIO.output(pins["extend"], GPIO.HIGH)
-            GPIO.output(pins["retract"], GPIO.LOW)
-        elif percent < current:
-            # 수축 (retract)
-            GPIO.output(pins["extend"], GPIO.LOW)
-            GPIO.output(pins["retract"], GPIO.HIGH)
-        else:
-            # 정지
-            GPIO.output(pins["extend"], GPIO.LOW)
-            GPIO.output(pins["retract"], GPIO.LOW)
-
-        # PWM duty cycle 설정 (속도 제어)
-        duty = min(max(abs(percent - current), 20), 80)  # 20~80% 범위
-        self.pwm_objects[name].ChangeDutyCycle(duty)
+        # 방향: 1 확장, -1 수축, 0 정지 / Direction: 1 extend, -1 retract, 0 stop
+        direction = (percent > current) - (percent < current)
+        if direction != self._last_direction[name]:
+            extend, retract = PinConfig.DIR_OUTPUTS[direction]
+            lgpio.gpio_write(self._chip, pins["extend"], extend)
+            lgpio.gpio_write(self._chip, pins["retract"], retract)
+            self._last_direction[name] = direction
+
+        # PWM duty cycle 설정 (속도 제어, 정수로 양자화)
+        # Set PWM duty cycle (speed control, quantized to an integer)
+        duty = max(20, min(80, int(abs(percent - current))))  # 20~80% 범위
+        if duty != self._last_duty[name]:
+            lgpio.tx_pwm(self._chip, pins["pwm"], PinConfig.PWM_FREQUENCY, duty)
+            self._last_duty[name] = duty
         self.current_positions[name] = percent
 
     def cleanup(self):
         """GPIO 정리 / GPIO cleanup"""
         if not self.simulation:
             self.emergency_stop()
-            for pwm in self.pwm_objects.values():
-                pwm.stop()
-            GPIO.cleanup()
+            if self._estop_callback is not None:
+                self._estop_callback.cancel()
+            for pins in PinConfig.ACTUATORS.values():
+                lgpio.tx_pwm(self._chip, pins["pwm"], 0, 0)  # PWM 출력 중지 / Stop PWM output
+            lgpio.gpiochip_close(self._chip)
         logger.info("🧹 GPIO 정리 완료 / GPIO cleanup complete")
 
 
@@ -366,9 +437,20 @@ class PositionScheduler:
         # 현재 자세 / Current position
         self.current_position = Position.SUPINE
 
+        # get_status() 결과 캐시 — 상태가 바뀔 때만 다시 생성
+        # Cached get_status() result — rebuilt only after a state change
+        self._status_dirty = True
+        self._status_cache: dict = {}
+
+        # 상태 변경/수동 변환 요청 시 대기 중인 루프를 즉시 깨움
+        # Wakes the waiting loop immediately on state changes or manual rotation requests
+        self._wakeup = asyncio.Event()
+        self._manual_rotate_requested = False
+
     async def start(self):
         """스케줄러 시작 / Start scheduler"""
         self.is_running = True
+        self._status_dirty = True
         logger.info(f"🚀 CareBot 스케줄러 시작 / Scheduler started")
         logger.info(f"⏱️  자세 변환 주기: {self.ROTATION_INTERVAL_SECONDS // 60}분 마다")
         logger.info(f"⏱️  Rotation interval: every {self.ROTATION_INTERVAL_SECONDS // 60} minutes")
@@ -377,16 +459,40 @@ class PositionScheduler:
         # Initial position: supine
         await self._apply_position(Position.SUPINE)
 
+        loop = asyncio.get_running_loop()
+
         while self.is_running:
             # 다음 자세 변환 시각 계산
             # Calculate next rotation time
-            import time
-            self.next_rotation_time = datetime.now()
-            await asyncio.sleep(self.ROTATION_INTERVAL_SECONDS)
+            self.next_rotation_time = datetime.now() + timedelta(
+                seconds=self.ROTATION_INTERVAL_SECONDS
+            )
+            self._status_dirty = True
+            deadline = loop.time() + self.ROTATION_INTERVAL_SECONDS
+
+            # 주기 경과, 종료, 수동 변환 요청 중 먼저 오는 것까지 대기
+            # (일시정지/재개로 깨어나도 이번 주기의 마감 시각은 유지)
+            # Wait for the interval, a stop, or a manual request, whichever comes first
+            # (waking for pause/resume keeps this interval's deadline)
+            while self.is_running and not self._manual_rotate_requested:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break  # 정상 주기 경과 / Normal interval elapsed
+                self._wakeup.clear()
+            self._wakeup.clear()
 
             if not self.is_running:
                 break
 
+            if self._manual_rotate_requested:
+                self._manual_rotate_requested = False
+                await self._perform_rotation()
+                continue
+
             if self.is_paused:
                 logger.info("⏸️  스케줄러 일시정지 중 / Scheduler paused — skipping rotation")
                 continue
@@ -399,6 +505,7 @@ class PositionScheduler:
         # Determine next position
         self.rotation_index = (self.rotation_index + 1) % len(POSITION_ROTATION)
         next_position = POSITION_ROTATION[self.rotation_index]
+        self._status_dirty = True
 
         logger.info(f"⏰ 자세 변환 시각 도래 / Rotation time reached")
         logger.info(f"   현재: {POSITION_NAMES_KO[self.current_position]}")
@@ -423,6 +530,7 @@ class PositionScheduler:
             await self._apply_position(next_position)
             self.total_rotations += 1
             self.last_rotation_time = datetime.now()
+            self._status_dirty = True
 
             # 보호자 알림 (정상 완료)
             # Caregiver alert (normal completion)
@@ -451,28 +559,53 @@ class PositionScheduler:
             target_values=target,
         )
         self.current_position = position
+        self._status_dirty = True
 
     def pause(self):
         """자동 스케줄 일시정지 / Pause automatic schedule"""
         self.is_paused = True
+        self._status_dirty = True
+        self._wakeup.set()
         logger.info("⏸️  자동 자세 변환 일시정지 / Automatic rotation paused")
 
     def resume(self):
         """자동 스케줄 재개 / Resume automatic schedule"""
         self.is_paused = False
+        self._status_dirty = True
+        self._wakeup.set()
         logger.info("▶️  자동 자세 변환 재개 / Automatic rotation resumed")
 
+    def trigger_rotation(self):
+        """다음 자세로 즉시 변환 요청 / Request an immediate rotation to the next position"""
+        self._manual_rotate_requested = True
+        self._wakeup.set()
+        logger.info("👆 즉시 자세 변환 요청 / Immediate rotation requested")
+
     def stop(self):
         """스케줄러 종료 / Stop scheduler"""
         self.is_running = False
+        self._status_dirty = True
+        self._wakeup.set()
         logger.info("🛑 스케줄러 종료 / Scheduler stopped")
 
     def get_status(self) -> dict:
-        """현재 상태 반환 / Return current status"""
+        """
+        현재 상태 반환 / Return current status
+
+        상태가 바뀌지 않았으면 캐시된 값을 복사해 반환 (호출자가 수정해도 안전)
+        Returns a copy of the cached status when nothing changed (safe for callers to mutate)
+        """
+        if self._status_dirty:
+            self._status_cache = self._build_status()
+            self._status_dirty = False
+        return dict(self._status_cache)
+
+    def _build_status(self) -> dict:
+        """상태 딕셔너리 생성 / Build the status dictionary"""
         return {
             "is_running": self.is_running,
             "is_paused": self.is_paused,
-            "current_position": self.current_position.value,
+            "current_position": POSITION_STR[self.current_position],
             "current_position_ko": POSITION_NAMES_KO[self.current_position],
             "last_rotation_time": (
                 self.last_rotation_time.isoformat()
@@ -0,0 +1,4 @@
+"""
+CareBot API 패키지 — FastAPI 서버 및 서비스
+CareBot API package — FastAPI server and services
+"""
@@ -7,44 +7,123 @@ Backend server for dashboard and external notification systems
 """
 
 import asyncio
+import json
+import logging
 import os
-import sys
+import threading
+import time
+from collections import deque
 from contextlib import asynccontextmanager
 from datetime import datetime
-from pathlib import Path
-from typing import Optional
+from itertools import islice
+from typing import Optional, TypeVar
 
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+import msgspec
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
-# 상위 디렉토리에서 carebot_core 임포트
-# Import carebot_core from parent directory
-sys.path.append(str(Path(__file__).parent.parent))
+try:
+    import orjson  # 빠른 JSON 직렬화 / Fast JSON serialization
+except ImportError:
+    orjson = None  # 제한된 배포 환경에서는 표준 json 사용 / Fall back to stdlib json
 
 from carebot_core.main import (
     ActuatorController,
     Position,
     POSITION_NAMES_KO,
+    POSITION_ROTATION,
+    POSITION_STR,
     POSITION_TARGETS,
     PositionScheduler,
     SafetyChecker,
     SIMULATION_MODE,
 )
+from carebot_api.services.ai_service import (
+    close_service,
+    get_patient_summary,
+    get_patient_summary_stream,
+)
+
+logger = logging.getLogger("carebot.api")
+
+# 자세 식별 문자열 → Position (잘못된 값은 예외 없이 None)
+# Position identifier → Position (invalid values give None, no exception)
+_POSITION_BY_VALUE = {value: Position(i) for i, value in enumerate(POSITION_STR)}
+_VALID_POSITION_VALUES = list(_POSITION_BY_VALUE)
+
+# 순환 위치별 다음 자세 (rotation_index → 다음 자세) / Next position per rotation slot (rotation_index → next)
+_NEXT_POSITION = tuple(
+    POSITION_ROTATION[(i + 1) % len(POSITION_ROTATION)] for i in range(len(POSITION_ROTATION))
+)
 
 # ─────────────────────────────────────────────
 # 전역 상태 / Global State
 # ─────────────────────────────────────────────
+# 보관할 최대 기록 수 (초과 시 오래된 것부터 삭제) / Max retained log entries (oldest evicted first)
+MAX_POSITION_LOGS = 10_000
+
+# AI 요약에 넘기는 최근 기록 수 / Number of recent log entries passed to the AI summary
+AI_SUMMARY_LOG_LIMIT = 500
+
+# AI 요약 응답 대기 한도 (초) — API 타임아웃 30초 + 속도 제한 대기 여유
+# Max wait for an AI summary (seconds) — 30 s API timeout plus headroom for rate-limit waits
+AI_SUMMARY_TIMEOUT = 60.0
+
+# 스트림이 도중에 끊겼을 때 본문 끝에 붙이는 표시 (헤더는 이미 전송됨)
+# Marker appended when a stream breaks off midway (headers are already sent)
+AI_STREAM_INTERRUPTED = "\n\n⚠️ AI 분석 중단 / AI analysis interrupted"
+
+
 class AppState:
-    actuator: Optional[ActuatorController] = None
-    scheduler: Optional[PositionScheduler] = None
-    safety: Optional[SafetyChecker] = None
-    websocket_clients: list[WebSocket] = []
-    position_logs: list[dict] = []  # 자세 변환 이력 / Position change history
+    __slots__ = (
+        "actuator",
+        "scheduler",
+        "safety",
+        "websocket_clients",
+        "position_logs",
+        "event_queue",
+        "dispatcher",
+        "resume_handle",
+        "current_move",
+        "estopped",
+        "ai_loop",
+        "ai_thread",
+    )
+
+    def __init__(self):
+        self.actuator: Optional[ActuatorController] = None
+        self.scheduler: Optional[PositionScheduler] = None
+        self.safety: Optional[SafetyChecker] = None
+        self.websocket_clients: dict[WebSocket, asyncio.Queue] = {}  # 소켓 → 전송 대기열 / socket → send queue
+        self.position_logs: deque[dict] = deque(maxlen=MAX_POSITION_LOGS)  # 자세 변환 이력 / Position change history
+        self.event_queue: Optional[asyncio.Queue] = None        # 디스패처 작업 대기열 / Dispatcher work queue
+        self.dispatcher: Optional[asyncio.Task] = None          # 상주 디스패처 작업 / Long-lived dispatcher task
+        self.resume_handle: Optional[asyncio.TimerHandle] = None  # 예약된 자동 재개 / Pending auto-resume
+        self.current_move: Optional[asyncio.Task] = None    # 진행 중인 수동 자세 변환 / Manual move in progress
+        self.estopped: bool = False  # 긴급 정지 후 수동 재개 전까지 유지 / Latched from e-stop until a manual resume
+        self.ai_loop: Optional[asyncio.AbstractEventLoop] = None  # AI 분석 전용 루프 / Dedicated AI loop
+        self.ai_thread: Optional[threading.Thread] = None   # AI 루프 실행 스레드 / Thread running the AI loop
+
 
 app_state = AppState()
 
+# 초 단위로 캐시한 현재 시각 문자열 [초, ISO 문자열]
+# Current-time string cached per whole second [seconds, ISO string]
+_iso_cache = [0, ""]
+
+
+def fast_iso_now() -> str:
+    """
+    현재 시각 ISO 문자열 (초 단위, 1초에 한 번만 생성)
+    Current time as an ISO string (second precision, rebuilt at most once per second)
+    """
+    t = int(time.time())
+    if t != _iso_cache[0]:
+        _iso_cache[0] = t
+        _iso_cache[1] = datetime.fromtimestamp(t).isoformat()
+    return _iso_cache[1]
+
 
 # ─────────────────────────────────────────────
 # 앱 수명 주기 / App Lifecycle
@@ -53,13 +132,29 @@ app_state = AppState()
 async def lifespan(app: FastAPI):
     """앱 시작/종료 시 로봇 시스템 초기화 / Initialize robot system on app start/stop"""
     # 시작 / Startup
+    # AI 분석 전용 이벤트 루프 — 느린 Claude API 호출이 스케줄러/액추에이터 루프를 지연시키지 않도록 분리
+    # (수명 주기마다 새로 만들어 재시작 후에도 사용 가능)
+    # Dedicated event loop for AI analysis — keeps slow Claude API calls off the scheduler/actuator loop
+    # (created per lifespan so it is usable again after a restart)
+    app_state.ai_loop = asyncio.new_event_loop()
+    app_state.ai_thread = threading.Thread(
+        target=app_state.ai_loop.run_forever, name="carebot-ai", daemon=True
+    )
+    app_state.ai_thread.start()
+
     app_state.actuator = ActuatorController(simulation=SIMULATION_MODE)
     app_state.safety = SafetyChecker(simulation=SIMULATION_MODE)
 
     async def caregiver_alert(level: str, message: str, requires_manual: bool):
-        """보호자 알림 + WebSocket 브로드캐스트"""
+        """
+        보호자 알림 + WebSocket 브로드캐스트
+        Caregiver alert + WebSocket broadcast
+
+        기록 추가와 대기열 추가 모두 동기 처리 — 스케줄러가 느린 클라이언트를 기다리지 않음
+        Log append and enqueue are both synchronous — the scheduler never waits on slow clients
+        """
         log_entry = {
-            "time": datetime.now().isoformat(),
+            "time": fast_iso_now(),
             "level": level,
             "message": message,
             "requires_manual": requires_manual,
@@ -68,7 +163,7 @@ async def lifespan(app: FastAPI):
 
         # WebSocket 클라이언트들에게 실시간 알림
         # Broadcast to all WebSocket clients
-        await broadcast_to_websockets({"type": "alert", "data": log_entry})
+        broadcast_nowait({"type": "alert", "data": log_entry})
 
     app_state.scheduler = PositionScheduler(
         actuator=app_state.actuator,
@@ -80,23 +175,61 @@ async def lifespan(app: FastAPI):
     # Start scheduler in background
     asyncio.create_task(app_state.scheduler.start())
 
+    # 요청별 작업 생성 대신 상주 디스패처 하나가 처리
+    # One long-lived dispatcher handles deferred work instead of a task per request
+    app_state.estopped = False
+    app_state.event_queue = asyncio.Queue()
+    app_state.dispatcher = asyncio.create_task(_dispatch_loop(app_state.event_queue))
+
     yield
 
     # 종료 / Shutdown
+    app_state.dispatcher.cancel()
+    if app_state.current_move:
+        app_state.current_move.cancel()
+    if app_state.resume_handle:
+        app_state.resume_handle.cancel()
     if app_state.scheduler:
         app_state.scheduler.stop()
     if app_state.actuator:
         app_state.actuator.cleanup()
 
+    # AI 루프의 남은 작업/대기열과 HTTP 연결 정리 후 AI 루프 종료
+    # Cancel the AI loop's leftover tasks, reset its queues and close connections, then stop the AI loop
+    ai_loop, app_state.ai_loop = app_state.ai_loop, None
+    try:
+        await asyncio.wait_for(
+            asyncio.wrap_future(asyncio.run_coroutine_threadsafe(close_service(), ai_loop)),
+            timeout=5.0,
+        )
+    finally:
+        ai_loop.call_soon_threadsafe(ai_loop.stop)
+        await asyncio.to_thread(app_state.ai_thread.join, 5.0)
+        if not ai_loop.is_running():
+            ai_loop.close()
+
 
 # ─────────────────────────────────────────────
 # FastAPI 앱 설정 / FastAPI App Configuration
 # ─────────────────────────────────────────────
+class FastJSONResponse(JSONResponse):
+    """
+    orjson으로 직렬화하는 JSON 응답 (없으면 표준 json)
+    JSON response rendered with orjson (stdlib json fallback)
+    """
+
+    def render(self, content) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content)
+
+
 app = FastAPI(
     title="CareBot API",
     description="욕창 방지 자세 변환 로봇 제어 API / Pressure Ulcer Prevention Robot Control API",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 app.add_middleware(
@@ -108,45 +241,204 @@ app.add_middleware(
 
 
 # ─────────────────────────────────────────────
-# Pydantic 모델 / Pydantic Models
+# 요청 모델 / Request Models
 # ─────────────────────────────────────────────
-class RotateRequest(BaseModel):
+# 외부 요청 본문만 검증함 — 상태/기록 같은 내부 데이터는 모델 없이 dict로 전달
+# msgspec이 바이트에서 바로 구조체를 만들어 검증 (Pydantic 검증 단계 없음)
+# Only inbound request bodies are validated — internal status/log data stays as plain dicts
+# msgspec decodes and validates straight from bytes into the struct (no Pydantic validator chain)
+class RotateRequest(msgspec.Struct):
     position: Optional[str] = None  # None이면 자동 다음 자세 / None = auto next position
     reason: Optional[str] = None    # 수동 변환 사유 / Reason for manual rotation
 
 
-class PauseRequest(BaseModel):
+class PauseRequest(msgspec.Struct):
     duration_minutes: Optional[int] = None  # None이면 무한 정지 / None = indefinite pause
 
 
+_RequestModel = TypeVar("_RequestModel", bound=msgspec.Struct)
+
+
+async def _decode_body(request: Request, model: type[_RequestModel]) -> _RequestModel:
+    """요청 본문을 모델로 변환, 잘못된 입력은 422 / Decode the request body into a model, 422 on bad input"""
+    try:
+        # strict=False: 이전 Pydantic처럼 "5" → 5 같은 변환 허용 / Keep Pydantic-style coercion such as "5" → 5
+        return msgspec.json.decode(await request.body(), type=model, strict=False)
+    except (msgspec.DecodeError, msgspec.ValidationError) as e:
+        raise HTTPException(status_code=422, detail=f"잘못된 요청 본문 / Invalid request body: {e}")
+
+
 # ─────────────────────────────────────────────
 # WebSocket 브로드캐스트 / WebSocket Broadcast
 # ─────────────────────────────────────────────
+# 클라이언트별 전송 대기열 크기 — 넘치면 느린 클라이언트로 보고 연결 종료
+# Per-client send queue size — overflowing clients are treated as stalled and dropped
+WS_QUEUE_SIZE = 32
+
+# 클라이언트별 전송 시간 제한 / Per-client send timeout
+WS_SEND_TIMEOUT = 5.0
+
+# 이 수마다 이벤트 루프에 양보해 대규모 브로드캐스트 중에도 다른 요청 처리
+# Yield to the event loop every this many clients so large fan-outs don't starve other work
+BROADCAST_BATCH_SIZE = 50
+
+
+def _ws_text(message: dict) -> str:
+    """WebSocket 전송용 JSON 직렬화 (send_json과 같은 형식) / JSON for WebSocket frames (same as send_json)"""
+    if orjson is not None:
+        return orjson.dumps(message).decode()
+    return json.dumps(message, ensure_ascii=False, separators=(",", ":"))
+
+
+async def _relay(ws: WebSocket, queue: asyncio.Queue):
+    """
+    클라이언트 대기열을 비우며 전송하는 연결별 작업
+    Per-connection task that drains the client's queue onto the socket
+    """
+    try:
+        while True:
+            text = await queue.get()
+            await asyncio.wait_for(ws.send_text(text), timeout=WS_SEND_TIMEOUT)
+    except Exception:
+        # 전송 실패/지연 클라이언트 정리 / Clean up clients whose sends fail or stall
+        app_state.websocket_clients.pop(ws, None)
+        await _close_quietly(ws)
+
+
+async def _close_quietly(ws: WebSocket):
+    try:
+        await ws.close(code=1013)  # 1013: 나중에 다시 시도 / Try again later
+    except Exception:
+        pass  # 이미 닫힌 연결 / Already closed
+
+
 async def broadcast_to_websockets(message: dict):
-    """모든 연결된 WebSocket 클라이언트에 메시지 전송"""
-    dead_sockets = []
-    for ws in app_state.websocket_clients:
+    """
+    모든 연결된 WebSocket 클라이언트의 대기열에 메시지 추가
+    Enqueue a message on every connected WebSocket client's queue
+
+    직렬화는 한 번만 하고, 실제 전송은 각 연결의 relay 작업이 담당
+    Serialized once; the actual sends are done by each connection's relay task
+    """
+    text = _ws_text(message)
+    clients = list(app_state.websocket_clients.items())
+    for i in range(0, len(clients), BROADCAST_BATCH_SIZE):
+        if i:
+            await asyncio.sleep(0)
+        _enqueue_text(clients[i:i + BROADCAST_BATCH_SIZE], text)
+
+
+def broadcast_nowait(message: dict):
+    """
+    대기 없이 한 번에 모든 클라이언트 대기열에 추가 (스케줄러 알림 경로용)
+    Enqueue on every client in one pass without awaiting (for the scheduler's alert path)
+    """
+    _enqueue_text(list(app_state.websocket_clients.items()), _ws_text(message))
+
+
+def _enqueue_text(clients: list[tuple[WebSocket, asyncio.Queue]], text: str):
+    for ws, queue in clients:
+        try:
+            queue.put_nowait(text)
+        except asyncio.QueueFull:
+            # 밀린 클라이언트는 끊고 재접속하게 함 / Disconnect backlogged clients so they reconnect
+            app_state.websocket_clients.pop(ws, None)
+            asyncio.create_task(_close_quietly(ws))
+
+
+# ─────────────────────────────────────────────
+# 이벤트 디스패처 / Event Dispatcher
+# ─────────────────────────────────────────────
+async def _dispatch_loop(queue: asyncio.Queue):
+    """
+    대기열의 (종류, 값) 작업을 순서대로 처리하는 상주 작업
+    Long-lived task that processes (kind, payload) work items in order
+
+    - ("apply", Position): 자세 적용 (수동 변환끼리 겹치지 않음) / Apply a position (manual moves never overlap)
+    - ("resume_at", loop 시각 | None): 자동 재개 예약/취소 / Schedule or cancel auto-resume
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        kind, payload = await queue.get()
         try:
-            await ws.send_json(message)
+            if kind == "apply":
+                await _apply_queued(payload)
+            elif kind == "resume_at":
+                if app_state.resume_handle:
+                    app_state.resume_handle.cancel()
+                app_state.resume_handle = (
+                    loop.call_at(payload, _auto_resume) if payload is not None else None
+                )
         except Exception:
-            dead_sockets.append(ws)
-    for ws in dead_sockets:
-        app_state.websocket_clients.remove(ws)
+            logger.exception(f"⚠️ 디스패처 작업 실패 / Dispatcher work failed: {kind}")
+
+
+async def _apply_queued(position: Position):
+    """
+    대기열에 있던 자세 변환 실행 — 실행 직전에 상태와 안전을 다시 확인
+    Run a queued position change — state and safety are re-checked right before moving
+
+    안전 검사가 실패하거나 검사 후 긴급 정지/종료 상태이면 건너뜀
+    (일시정지는 자동 변환만 멈추므로 수동 변환은 그대로 실행)
+    Skipped if the safety check fails, or if e-stopped or shut down once it returns
+    (a pause only stops automatic rotation, so manual moves still run)
+    """
+    is_safe, reason = await app_state.safety.is_safe_to_move()
+    if not is_safe:
+        logger.warning(
+            f"⏭️ 안전 검사 실패 — 대기 중 자세 변환 취소 / "
+            f"Safety check failed — queued move skipped: {reason}"
+        )
+        return
+
+    # 안전 검사를 기다리는 동안 바뀌었을 수 있으므로 이동 직전에 확인
+    # Checked right before moving, since the state may have changed during the safety check
+    scheduler = app_state.scheduler
+    if app_state.estopped or scheduler is None or not scheduler.is_running:
+        logger.warning(
+            f"⏭️ 긴급 정지/종료 상태 — 대기 중 자세 변환 취소 / "
+            f"E-stopped or stopped — queued move skipped: {POSITION_STR[position]}"
+        )
+        return
+
+    # 긴급 정지가 이동 중에 취소할 수 있도록 별도 작업으로 실행
+    # Run as its own task so an emergency stop can cancel it mid-move
+    move = asyncio.ensure_future(scheduler._apply_position(position))
+    app_state.current_move = move
+    try:
+        await asyncio.shield(move)
+    except asyncio.CancelledError:
+        if not move.cancelled():
+            raise  # 디스패처 자체가 취소됨 / The dispatcher itself was cancelled
+        logger.warning(f"⛔ 자세 변환 중단됨 / Move aborted: {POSITION_STR[position]}")
+    finally:
+        app_state.current_move = None
+
+
+def _auto_resume():
+    app_state.resume_handle = None
+    if app_state.scheduler and not app_state.estopped:
+        app_state.scheduler.resume()
 
 
 # ─────────────────────────────────────────────
 # API 라우터 / API Routes
 # ─────────────────────────────────────────────
 
+# 루트 응답은 실행 중 바뀌지 않으므로 한 번만 직렬화 (헬스체크용)
+# The root payload never changes at runtime, so serialize it once (used as a health check)
+_ROOT_PAYLOAD = FastJSONResponse(content={
+    "service": "CareBot API",
+    "version": "1.0.0",
+    "description": "욕창 방지 자세 변환 로봇 제어 API",
+    "mode": "simulation" if SIMULATION_MODE else "hardware",
+}).body
+
+
 @app.get("/", tags=["시스템 / System"])
 async def root():
     """API 루트 / API root"""
-    return {
-        "service": "CareBot API",
-        "version": "1.0.0",
-        "description": "욕창 방지 자세 변환 로봇 제어 API",
-        "mode": "simulation" if SIMULATION_MODE else "hardware",
-    }
+    return Response(content=_ROOT_PAYLOAD, media_type="application/json")
 
 
 @app.get("/api/status", tags=["상태 / Status"])
@@ -164,15 +456,15 @@ async def get_status():
     # Add current actuator positions
     status["actuator_positions"] = app_state.actuator.current_positions if app_state.actuator else {}
 
-    return JSONResponse(content={
+    return FastJSONResponse(content={
         "success": True,
         "data": status,
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": fast_iso_now(),
     })
 
 
 @app.post("/api/position/rotate", tags=["자세 제어 / Position Control"])
-async def manual_rotate(request: RotateRequest):
+async def manual_rotate(raw_request: Request):
     """
     수동 자세 변환 트리거
     Manually trigger position rotation
@@ -180,10 +472,19 @@ async def manual_rotate(request: RotateRequest):
     보호자 또는 의료진이 즉시 자세 변환이 필요할 때 사용
     Used when caregiver or medical staff needs immediate repositioning
     """
+    request = await _decode_body(raw_request, RotateRequest)
     scheduler = app_state.scheduler
     if not scheduler:
         raise HTTPException(status_code=503, detail="서비스 준비 중입니다 / Service not ready")
 
+    # 긴급 정지 후에는 수동 재개 전까지 거절 — 일반 일시정지 중 수동 변환은 허용
+    # Refuse after an e-stop until a manual resume; manual moves are still allowed during a normal pause
+    if app_state.estopped:
+        raise HTTPException(
+            status_code=409,
+            detail="긴급 정지 상태 — 확인 후 재개하세요 / Emergency stopped — resume after checking",
+        )
+
     # 안전 검사 먼저 수행
     # Perform safety check first
     is_safe, reason = await app_state.safety.is_safe_to_move()
@@ -196,28 +497,24 @@ async def manual_rotate(request: RotateRequest):
     # 특정 자세 또는 자동 다음 자세로 이동
     # Move to specific or auto-next position
     if request.position:
-        try:
-            target_pos = Position(request.position)
-        except ValueError:
-            valid = [p.value for p in Position]
+        target_pos = _POSITION_BY_VALUE.get(request.position)
+        if target_pos is None:
             raise HTTPException(
                 status_code=400,
-                detail=f"유효하지 않은 자세 / Invalid position. Valid: {valid}",
+                detail=f"유효하지 않은 자세 / Invalid position. Valid: {_VALID_POSITION_VALUES}",
             )
     else:
         # 자동 다음 자세 결정
-        from carebot_core.main import POSITION_ROTATION
-        next_idx = (scheduler.rotation_index + 1) % len(POSITION_ROTATION)
-        target_pos = POSITION_ROTATION[next_idx]
+        target_pos = _NEXT_POSITION[scheduler.rotation_index]
 
     # 비동기로 자세 변환 실행 (요청은 즉시 반환)
     # Execute position change asynchronously (request returns immediately)
-    asyncio.create_task(scheduler._apply_position(target_pos))
+    app_state.event_queue.put_nowait(("apply", target_pos))
 
-    return JSONResponse(content={
+    return FastJSONResponse(content={
         "success": True,
         "message": f"자세 변환 시작됨 / Position change initiated: {POSITION_NAMES_KO[target_pos]}",
-        "target_position": target_pos.value,
+        "target_position": POSITION_STR[target_pos],
         "target_position_ko": POSITION_NAMES_KO[target_pos],
         "reason": request.reason or "수동 변환 / Manual rotation",
     })
@@ -229,28 +526,43 @@ async def emergency_stop():
     긴급 정지 — 모든 액추에이터 즉시 정지
     Emergency stop — Halt all actuators immediately
     """
+    app_state.estopped = True
+
+    # 진행 중인 수동 변환을 먼저 멈춰 정지 후 추가 출력이 없게 함
+    # Abort the manual move in progress first so nothing is written after the stop
+    if app_state.current_move:
+        app_state.current_move.cancel()
     if app_state.actuator:
         app_state.actuator.emergency_stop()
     if app_state.scheduler:
         app_state.scheduler.pause()
 
+    # 대기 중인 자세 변환과 자동 재개 예약 모두 폐기 (수동 확인 후에만 재개)
+    # Discard queued moves and any scheduled auto-resume (resume only after a manual check)
+    if app_state.event_queue:
+        while not app_state.event_queue.empty():
+            app_state.event_queue.get_nowait()
+    if app_state.resume_handle:
+        app_state.resume_handle.cancel()
+        app_state.resume_handle = None
+
     # 모든 대시보드에 긴급 정지 알림
     await broadcast_to_websockets({
         "type": "emergency_stop",
         "data": {
-            "time": datetime.now().isoformat(),
+            "time": fast_iso_now(),
             "message": "긴급 정지 실행됨 / Emergency stop executed",
         },
     })
 
-    return JSONResponse(content={
+    return FastJSONResponse(content={
         "success": True,
         "message": "긴급 정지 완료. 수동 확인 후 재개하세요. / Emergency stop complete. Resume after manual check.",
     })
 
 
 @app.post("/api/scheduler/pause", tags=["스케줄러 / Scheduler"])
-async def pause_scheduler(request: PauseRequest):
+async def pause_scheduler(raw_request: Request):
     """
     자동 자세 변환 스케줄 일시정지
     Pause automatic position rotation schedule
@@ -258,6 +570,7 @@ async def pause_scheduler(request: PauseRequest):
     의료 처치, 식사 등으로 잠시 중단이 필요할 때 사용
     Use when temporary pause needed for medical procedures, meals, etc.
     """
+    request = await _decode_body(raw_request, PauseRequest)
     if not app_state.scheduler:
         raise HTTPException(status_code=503, detail="서비스 준비 중 / Service not ready")
 
@@ -266,17 +579,14 @@ async def pause_scheduler(request: PauseRequest):
     if request.duration_minutes:
         # 지정 시간 후 자동 재개
         # Auto-resume after specified duration
-        async def auto_resume():
-            await asyncio.sleep(request.duration_minutes * 60)
-            if app_state.scheduler:
-                app_state.scheduler.resume()
-
-        asyncio.create_task(auto_resume())
+        resume_at = asyncio.get_running_loop().time() + request.duration_minutes * 60
+        app_state.event_queue.put_nowait(("resume_at", resume_at))
         message = f"스케줄 {request.duration_minutes}분 일시정지 / Schedule paused for {request.duration_minutes} minutes"
     else:
+        app_state.event_queue.put_nowait(("resume_at", None))  # 예약된 재개 취소 / Cancel any pending resume
         message = "스케줄 일시정지 (수동 재개 필요) / Schedule paused (manual resume required)"
 
-    return JSONResponse(content={"success": True, "message": message})
+    return FastJSONResponse(content={"success": True, "message": message})
 
 
 @app.post("/api/scheduler/resume", tags=["스케줄러 / Scheduler"])
@@ -285,8 +595,10 @@ async def resume_scheduler():
     if not app_state.scheduler:
         raise HTTPException(status_code=503, detail="서비스 준비 중 / Service not ready")
 
+    app_state.estopped = False  # 수동 재개 = 긴급 정지 확인 완료 / A manual resume acknowledges the e-stop
     app_state.scheduler.resume()
-    return JSONResponse(content={
+    app_state.event_queue.put_nowait(("resume_at", None))  # 예약된 재개 취소 / Cancel any pending resume
+    return FastJSONResponse(content={
         "success": True,
         "message": "자동 자세 변환 스케줄 재개됨 / Automatic rotation schedule resumed",
     })
@@ -298,11 +610,13 @@ async def get_logs(limit: int = 50):
     자세 변환 기록 조회
     Get position change history logs
     """
-    logs = app_state.position_logs[-limit:]  # 최근 N건 / Recent N entries
-    return JSONResponse(content={
+    # 뒤에서부터 N건만 읽어 최신 순으로 (오래된 기록은 순회하지 않음)
+    # Read only the last N entries from the right end, most recent first (no walk over older entries)
+    logs = list(islice(reversed(app_state.position_logs), max(0, limit)))
+    return FastJSONResponse(content={
         "success": True,
         "total": len(app_state.position_logs),
-        "data": list(reversed(logs)),  # 최신 순 / Most recent first
+        "data": logs,
     })
 
 
@@ -312,12 +626,68 @@ async def get_ai_summary():
     Claude AI 기반 환자 상태 요약 분석
     Patient status summary analysis powered by Claude AI
     """
-    from carebot_api.services.ai_service import get_patient_summary
-    summary = await get_patient_summary(
-        logs=app_state.position_logs,
-        current_status=app_state.scheduler.get_status() if app_state.scheduler else {},
+    ai_loop = app_state.ai_loop
+    if ai_loop is None or not ai_loop.is_running():
+        raise HTTPException(status_code=503, detail="AI 서비스 준비 중 / AI service not ready")
+
+    # AI 루프에서 실행하고 결과만 기다림 (기록은 스냅샷으로 전달)
+    # Run on the AI loop and await the result here (logs passed as a snapshot)
+    future = asyncio.run_coroutine_threadsafe(
+        get_patient_summary(
+            logs=list(app_state.position_logs)[-AI_SUMMARY_LOG_LIMIT:],
+            current_status=app_state.scheduler.get_status() if app_state.scheduler else {},
+        ),
+        ai_loop,
     )
-    return JSONResponse(content={"success": True, "data": summary})
+    try:
+        # 시간 초과 시 AI 루프의 작업도 함께 취소됨 / On timeout the AI-loop task is cancelled too
+        summary = await asyncio.wait_for(asyncio.wrap_future(future), timeout=AI_SUMMARY_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="AI 분석 시간 초과 / AI analysis timed out")
+    return FastJSONResponse(content={"success": True, "data": summary})
+
+
+@app.get("/api/ai/summary/stream", tags=["AI 분석 / AI Analysis"])
+async def stream_ai_summary():
+    """
+    AI 요약을 생성되는 대로 텍스트 조각으로 전송 (대시보드 점진 표시용)
+    Stream the AI summary as plain-text chunks while it is generated (for progressive display)
+    """
+    ai_loop = app_state.ai_loop
+    if ai_loop is None or not ai_loop.is_running():
+        raise HTTPException(status_code=503, detail="AI 서비스 준비 중 / AI service not ready")
+
+    logs = list(app_state.position_logs)[-AI_SUMMARY_LOG_LIMIT:]
+    current_status = app_state.scheduler.get_status() if app_state.scheduler else {}
+    api_loop = asyncio.get_running_loop()
+    chunks: asyncio.Queue = asyncio.Queue()
+
+    async def produce():
+        # AI 루프에서 실행, 조각을 API 루프의 대기열로 전달 (None = 끝)
+        # Runs on the AI loop, handing chunks to the API loop's queue (None = end)
+        try:
+            async for chunk in get_patient_summary_stream(logs, current_status):
+                api_loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+        except Exception:
+            logger.exception("⚠️ AI 요약 스트림 중단 / AI summary stream interrupted")
+            api_loop.call_soon_threadsafe(chunks.put_nowait, AI_STREAM_INTERRUPTED)
+        finally:
+            api_loop.call_soon_threadsafe(chunks.put_nowait, None)
+
+    async def relay():
+        future = asyncio.run_coroutine_threadsafe(produce(), ai_loop)
+        try:
+            while (chunk := await asyncio.wait_for(chunks.get(), timeout=AI_SUMMARY_TIMEOUT)) is not None:
+                yield chunk
+        except asyncio.TimeoutError:
+            # 이미 응답 중이므로 504 대신 본문에 중단 표시 / Already responding, so mark the body instead of a 504
+            logger.warning("⏱️ AI 요약 스트림 시간 초과 / AI summary stream timed out")
+            yield AI_STREAM_INTERRUPTED
+        finally:
+            # 연결이 끊기거나 시간 초과면 AI 루프의 작업도 취소 / Cancel the AI-loop work on disconnect or timeout
+            future.cancel()
+
+    return StreamingResponse(relay(), media_type="text/plain; charset=utf-8")
 
 
 # ─────────────────────────────────────────────
@@ -333,24 +703,29 @@ async def websocket_endpoint(websocket: WebSocket):
     Used by dashboard to receive real-time robot status updates
     """
     await websocket.accept()
-    app_state.websocket_clients.append(websocket)
+    queue: asyncio.Queue = asyncio.Queue(WS_QUEUE_SIZE)
+    relay = asyncio.create_task(_relay(websocket, queue))
 
     try:
         # 연결 즉시 현재 상태 전송
         # Send current status immediately on connection
         if app_state.scheduler:
-            await websocket.send_json({
+            queue.put_nowait(_ws_text({
                 "type": "initial_status",
                 "data": app_state.scheduler.get_status(),
-            })
+            }))
+        app_state.websocket_clients[websocket] = queue
 
-        # 연결 유지 (핑/퐁)
-        # Keep connection alive (ping/pong)
+        # 연결 유지 (핑/퐁) — 응답도 대기열을 거쳐 전송 순서 유지
+        # Keep connection alive (ping/pong) — replies go through the queue to keep ordering
         while True:
             data = await websocket.receive_text()
             if data == "ping":
-                await websocket.send_text("pong")
+                await queue.put("pong")
 
     except WebSocketDisconnect:
-        if websocket in app_state.websocket_clients:
-            app_state.websocket_clients.remove(websocket)
+        pass
+
+    finally:
+        relay.cancel()
+        app_state.websocket_clients.pop(websocket, None)
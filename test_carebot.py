@@ -4,8 +4,14 @@ CareBot 단위 테스트 / Unit Tests
 """
 
 import asyncio
+import json
 import os
 import sys
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -18,11 +24,16 @@ from carebot_core.main import (
     ActuatorController,
     Position,
     POSITION_ROTATION,
+    POSITION_STR,
     POSITION_TARGETS,
     POSITION_NAMES_KO,
     PositionScheduler,
     SafetyChecker,
 )
+from carebot_api.services import ai_service
+from carebot_api import main as api
+from carebot_api.main import app, app_state
+from fastapi.testclient import TestClient
 
 
 # ─────────────────────────────────────────────
@@ -53,6 +64,25 @@ class TestActuatorController:
             assert actuator.current_positions[actuator_name] == target_pct, \
                 f"{actuator_name}: 예상 {target_pct}, 실제 {actuator.current_positions[actuator_name]}"
 
+    @pytest.mark.asyncio
+    async def test_점진적_이동_선형_보간(self):
+        """중간 단계 위치가 시작점 기준 선형 보간이어야 함 / Intermediate steps should be linear from the start"""
+        actuator = ActuatorController(simulation=True)
+        observed = []
+
+        async def record_step(_delay):
+            observed.append(actuator.current_positions["head_left"])
+
+        with patch("carebot_core.main.asyncio.sleep", side_effect=record_step):
+            await actuator.move_to_position(
+                target_name="선형 보간 테스트",
+                target_values={"head_left": 60, "head_right": 0, "foot_left": 0, "foot_right": 0},
+                steps=3,
+                step_delay=0.0,
+            )
+
+        assert observed == pytest.approx([20, 40, 60])
+
     def test_긴급_정지_시뮬레이션(self):
         """긴급 정지가 시뮬레이션에서 오류 없이 실행되어야 함 / Emergency stop should work without errors"""
         actuator = ActuatorController(simulation=True)
@@ -117,6 +147,40 @@ class TestPositionScheduler:
         for key in required_keys:
             assert key in status, f"status에 '{key}' 키가 없습니다 / '{key}' key missing from status"
 
+    def test_상태_캐시_복사본_반환_및_갱신(self):
+        """get_status()는 캐시 복사본을 반환하고 상태 변경 시 갱신 / Returns a cached copy, refreshed on change"""
+        actuator = ActuatorController(simulation=True)
+        safety = SafetyChecker(simulation=True)
+        scheduler = PositionScheduler(actuator=actuator, safety=safety)
+
+        status = scheduler.get_status()
+        status["actuator_positions"] = {}
+        assert "actuator_positions" not in scheduler.get_status(), \
+            "호출자 수정이 캐시에 반영됨 / Caller mutation leaked into the cache"
+
+        scheduler.pause()
+        assert scheduler.get_status()["is_paused"] is True, \
+            "일시정지 후 상태가 갱신되지 않음 / Status not refreshed after pause"
+
+    @pytest.mark.asyncio
+    async def test_즉시_변환_요청과_종료가_대기_중_루프를_깨움(self):
+        """trigger_rotation()/stop()이 90분 대기 없이 즉시 반영 / Should take effect without the 90-minute wait"""
+        actuator = ActuatorController(simulation=True)
+        actuator.move_to_position = AsyncMock()
+        safety = SafetyChecker(simulation=True)
+        scheduler = PositionScheduler(actuator=actuator, safety=safety)
+
+        task = asyncio.create_task(scheduler.start())
+        await asyncio.sleep(0.05)
+
+        scheduler.trigger_rotation()
+        await asyncio.sleep(0.05)
+        assert scheduler.total_rotations == 1, \
+            "수동 변환 요청이 처리되지 않음 / Manual rotation request was not handled"
+
+        scheduler.stop()
+        await asyncio.wait_for(task, timeout=1.0)
+
     @pytest.mark.asyncio
     async def test_자세_변환_완료_후_카운터_증가(self):
         """자세 변환 완료 후 total_rotations 증가 / total_rotations should increment after rotation"""
@@ -149,18 +213,25 @@ class TestPositionDefinitions:
 
     def test_모든_자세에_한국어_이름_존재(self):
         """모든 자세에 한국어 이름이 정의되어야 함 / All positions should have Korean names"""
+        assert len(POSITION_NAMES_KO) == len(Position), \
+            "자세 수와 한국어 이름 수가 다릅니다 / Korean name count does not match positions"
         for pos in Position:
-            assert pos in POSITION_NAMES_KO, \
-                f"{pos.value}에 한국어 이름이 없습니다 / No Korean name for {pos.value}"
+            assert POSITION_NAMES_KO[pos], \
+                f"{POSITION_STR[pos]}에 한국어 이름이 없습니다 / No Korean name for {POSITION_STR[pos]}"
+
+    def test_자세_식별_문자열_정의(self):
+        """모든 자세에 API용 식별 문자열이 정의되어야 함 / All positions should have API identifiers"""
+        assert POSITION_STR == ("supine", "left_lateral", "right_lateral")
+        assert POSITION_STR[Position.SUPINE] == "supine"
 
     def test_모든_자세에_액추에이터_목표값_존재(self):
         """모든 자세에 액추에이터 목표값이 정의되어야 함 / All positions should have actuator targets"""
         required_actuators = {"head_left", "head_right", "foot_left", "foot_right"}
+        assert len(POSITION_TARGETS) == len(Position), \
+            "자세 수와 목표값 수가 다릅니다 / Target count does not match positions"
         for pos in Position:
-            assert pos in POSITION_TARGETS, \
-                f"{pos.value}에 목표값이 없습니다 / No target values for {pos.value}"
             assert set(POSITION_TARGETS[pos].keys()) == required_actuators, \
-                f"{pos.value}의 액추에이터 목표값이 불완전합니다 / Incomplete actuator targets for {pos.value}"
+                f"{POSITION_STR[pos]}의 액추에이터 목표값이 불완전합니다 / Incomplete actuator targets for {POSITION_STR[pos]}"
 
     def test_앙와위_목표값_모두_0(self):
         """앙와위(등 대고 누운 자세)의 모든 액추에이터 목표값은 0이어야 함"""
@@ -169,11 +240,418 @@ class TestPositionDefinitions:
 
     def test_액추에이터_목표값_범위_0_100(self):
         """모든 액추에이터 목표값은 0~100 범위 내여야 함 / All target values should be 0-100"""
-        for pos, targets in POSITION_TARGETS.items():
-            for actuator_name, value in targets.items():
+        for pos in Position:
+            for actuator_name, value in POSITION_TARGETS[pos].items():
                 assert 0 <= value <= 100, \
-                    f"{pos.value}.{actuator_name} 값 {value}이 0~100 범위를 벗어남 / Value out of 0-100 range"
+                    f"{POSITION_STR[pos]}.{actuator_name} 값 {value}이 0~100 범위를 벗어남 / Value out of 0-100 range"
+
+
+
+# ─────────────────────────────────────────────
+# AI 서비스 테스트 / AI Service Tests
+# ─────────────────────────────────────────────
+def _warning_logs(count: int = 3) -> list[dict]:
+    """경고 기록 (전체 모델 경로로 분류됨) / Warning logs (classified for the full model)"""
+    now = datetime.now().isoformat()
+    return [
+        {"time": now, "level": "warning", "message": f"경고 {i} / warning {i}", "requires_manual": False}
+        for i in range(count)
+    ]
+
+
+def _status(position: str = "supine") -> dict:
+    return {"current_position": position, "total_rotations": 3, "is_paused": False}
+
+
+def _sse_body(*texts: str) -> bytes:
+    """Messages API 스트리밍 응답 형식의 본문 / Body in the Messages API streaming format"""
+    events = [{"type": "message_start", "message": {"usage": {"cache_read_input_tokens": 5}}}]
+    events += [{"type": "content_block_delta", "delta": {"type": "text_delta", "text": t}} for t in texts]
+    events += [{"type": "message_delta", "usage": {"output_tokens": 7}}, {"type": "message_stop"}]
+    return "".join(f"event: {e['type']}\ndata: {json.dumps(e)}\n\n" for e in events).encode()
+
+
+class TestAIService:
+
+    @pytest.fixture(autouse=True)
+    def _fresh_state(self, monkeypatch):
+        """테스트마다 캐시/차단기/제한기 초기화 / Reset caches, breaker and limiter per test"""
+        monkeypatch.setattr(ai_service, "ANTHROPIC_API_KEY", "test-key")
+        monkeypatch.setattr(ai_service, "_LIMITER", ai_service._RateLimiter(1000, 10_000_000))
+        monkeypatch.setattr(ai_service, "_FLUSH_TASK", None)
+        monkeypatch.setattr(ai_service, "_CLIENT", None)
+        ai_service._SUMMARY_CACHE.clear()
+        ai_service._SEMANTIC_CACHE.clear()
+        ai_service._PENDING.clear()
+        ai_service._IN_FLIGHT.clear()
+        ai_service._CB.update(failures=0, opened_at=0.0, probing=False)
+
+    @staticmethod
+    def _use_transport(handler):
+        """모의 전송 계층으로 API 호출 대체 / Route API calls to a mock transport"""
+        ai_service._CLIENT = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    @pytest.mark.asyncio
+    async def test_호출_중_도착한_요청도_완료됨(self):
+        """호출 진행 중 들어온 다른 요청도 대기 창 후 처리되어야 함 / A request arriving mid-call must still complete"""
+        calls = []
+
+        async def slow_api(request):
+            calls.append(request)
+            await asyncio.sleep(0.5)
+            return httpx.Response(200, content=_sse_body("요약"))
+
+        self._use_transport(slow_api)
+        first = asyncio.create_task(ai_service.get_patient_summary(_warning_logs(), _status("supine")))
+        await asyncio.sleep(ai_service._BATCH_WINDOW + 0.1)  # 첫 호출 진행 중 / First call in flight
+        second = asyncio.create_task(ai_service.get_patient_summary(_warning_logs(), _status("left_lateral")))
+
+        results = await asyncio.wait_for(asyncio.gather(first, second), timeout=3)
+
+        assert [r["summary"] for r in results] == ["요약", "요약"]
+        assert len(calls) == 2
+        assert not ai_service._PENDING and not ai_service._IN_FLIGHT
+
+    @pytest.mark.asyncio
+    async def test_같은_입력_동시_요청은_호출_한_번(self):
+        """같은 입력이 동시에 들어오면 API 호출은 한 번만 / Identical concurrent requests share one API call"""
+        calls = []
+
+        async def slow_api(request):
+            calls.append(request)
+            await asyncio.sleep(0.1)
+            return httpx.Response(200, content=_sse_body("요약"))
+
+        self._use_transport(slow_api)
+        logs = _warning_logs()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        results = await asyncio.gather(
+            *(ai_service.get_patient_summary(logs, _status()) for _ in range(3))
+        )
+
+        # 대기 중인 요청이 없으면 대기 창 없이 바로 호출 / No batch-window wait when nothing is pending
+        assert loop.time() - started < 0.1 + ai_service._BATCH_WINDOW
+        assert len(calls) == 1
+        assert all(r["summary"] == "요약" for r in results)
+
+    @pytest.mark.asyncio
+    async def test_스트리밍_조각과_사용량_파싱(self):
+        """SSE data 줄에서 텍스트 조각과 사용량을 읽어야 함 / Text deltas and usage come from SSE data lines"""
+        sent = []
+
+        def api(request):
+            sent.append(json.loads(request.content))
+            return httpx.Response(200, content=_sse_body("첫 문장. ", "둘째 문장."))
+
+        self._use_transport(api)
+        chunks = [c async for c in ai_service.get_patient_summary_stream(_warning_logs(), _status())]
+
+        assert chunks == ["첫 문장. ", "둘째 문장."]
+        assert sent[0]["stream"] is True
+        (_, cached), = ai_service._SUMMARY_CACHE.values()
+        assert cached["summary"] == "첫 문장. 둘째 문장."
+        assert cached["cache_read_input_tokens"] == 5
+
+    @pytest.mark.asyncio
+    async def test_같은_입력_동시_스트림은_호출_한_번(self):
+        """같은 입력의 동시 스트림은 진행 중 호출을 공유 / Identical concurrent streams share the in-flight call"""
+        calls = []
 
+        async def slow_api(request):
+            calls.append(request)
+            await asyncio.sleep(0.1)
+            return httpx.Response(200, content=_sse_body("첫 문장. ", "둘째 문장."))
+
+        self._use_transport(slow_api)
+        logs = _warning_logs()
+
+        async def collect():
+            return [c async for c in ai_service.get_patient_summary_stream(logs, _status())]
+
+        first, *joined = await asyncio.gather(*(collect() for _ in range(3)))
+
+        assert len(calls) == 1
+        assert first == ["첫 문장. ", "둘째 문장."]
+        assert joined == [["첫 문장. 둘째 문장."]] * 2
+
+    @pytest.mark.asyncio
+    async def test_스트림_오류_이벤트는_기본_요약으로_대체(self):
+        """첫 조각 전 error 이벤트면 기본 요약 반환 / An error event before any text yields the basic summary"""
+        error = {"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}}
+        self._use_transport(lambda request: httpx.Response(200, content=f"data: {json.dumps(error)}\n\n".encode()))
+
+        chunks = [c async for c in ai_service.get_patient_summary_stream(_warning_logs(), _status())]
+
+        assert len(chunks) == 1 and "CareBot" in chunks[0]
+        assert ai_service._CB["failures"] == 1
+        assert not ai_service._SUMMARY_CACHE
+
+    @pytest.mark.asyncio
+    async def test_같은_입력은_캐시에서_반환(self):
+        """같은 기록/상태로 다시 요청하면 API를 호출하지 않음 / Identical input is served from the cache"""
+        calls = []
+
+        def api(request):
+            calls.append(request)
+            return httpx.Response(200, content=_sse_body("요약"))
+
+        self._use_transport(api)
+        logs = _warning_logs()
+        first = await ai_service.get_patient_summary(logs, _status())
+        second = await ai_service.get_patient_summary(logs, _status())
+
+        assert len(calls) == 1
+        assert second["cache_hit"] is True
+        assert second["summary"] == first["summary"]
+
+    @pytest.mark.asyncio
+    async def test_근사_일치_캐시_적중과_불일치(self):
+        """정상 기록 한 건 추가는 재사용, 자세 변경은 새로 호출 / One extra info log reuses; a position change calls again"""
+        calls = []
+
+        def api(request):
+            calls.append(request)
+            return httpx.Response(200, content=_sse_body(f"요약 {len(calls)}"))
+
+        self._use_transport(api)
+        logs = _warning_logs()
+        await ai_service.get_patient_summary(logs, _status("supine"))
+
+        info_log = {"time": datetime.now().isoformat(), "level": "info", "message": "정상 / ok"}
+        near = await ai_service.get_patient_summary(logs + [info_log], _status("supine"))
+        assert len(calls) == 1
+        assert near["summary"] == "요약 1"
+
+        moved = await ai_service.get_patient_summary(logs, _status("left_lateral"))
+        assert len(calls) == 2
+        assert moved["summary"] == "요약 2"
+
+    @pytest.mark.asyncio
+    async def test_연속_실패_시_차단기_열림_후_시험_호출(self):
+        """3회 연속 실패 후 차단, 대기 후 시험 호출 성공 시 닫힘 / Opens after 3 failures; a successful probe closes it"""
+        calls = []
+        healthy = False
+
+        def api(request):
+            calls.append(request)
+            if healthy:
+                return httpx.Response(200, content=_sse_body("복구"))
+            return httpx.Response(500)
+
+        self._use_transport(api)
+        for position in ("supine", "left_lateral", "right_lateral"):
+            result = await ai_service.get_patient_summary(_warning_logs(), _status(position), urgent=True)
+            assert "ai_error" in result
+
+        blocked = await ai_service.get_patient_summary(_warning_logs(5), _status(), urgent=True)
+        assert blocked.get("circuit_open") is True
+        assert len(calls) == 3
+
+        # 대기 시간 경과 → 반개방: 시험 호출 한 건만 허용 / Cooldown elapsed → half-open: one probe allowed
+        ai_service._CB["opened_at"] -= ai_service._CB_COOLDOWN
+        healthy = True
+        probe = await ai_service.get_patient_summary(_warning_logs(5), _status(), urgent=True)
+
+        assert probe["summary"] == "복구"
+        assert len(calls) == 4
+        assert ai_service._CB["failures"] == 0 and not ai_service._CB["probing"]
+
+    @pytest.mark.asyncio
+    async def test_429_응답_시_속도_제한기_대기(self):
+        """429의 retry-after 동안 호출을 멈춰야 함 / A 429 holds off calls for its retry-after"""
+        self._use_transport(lambda request: httpx.Response(429, headers={"retry-after": "2"}))
+
+        result = await ai_service.get_patient_summary(_warning_logs(), _status(), urgent=True)
+
+        assert "ai_error" in result
+        remaining = ai_service._LIMITER.blocked_until - ai_service.time.monotonic()
+        assert 1.5 < remaining <= 2
+        assert ai_service._LIMITER.available_request_capacity == 0
+
+    @pytest.mark.asyncio
+    async def test_종료_시_남은_호출과_대기열_정리(self):
+        """종료 정리는 남은 작업을 취소하고 모듈 상태를 초기화 / Shutdown cancels leftover work and resets module state"""
+        async def hung_api(request):
+            await asyncio.sleep(10)
+            return httpx.Response(200, content=_sse_body("요약"))
+
+        self._use_transport(hung_api)
+        first = asyncio.create_task(ai_service.get_patient_summary(_warning_logs(3), _status()))
+        await asyncio.sleep(0.05)
+        second = asyncio.create_task(ai_service.get_patient_summary(_warning_logs(1), _status()))
+        await asyncio.sleep(0.05)
+        assert ai_service._IN_FLIGHT and ai_service._PENDING
+        lock = ai_service._LIMITER._lock
+
+        await ai_service.close_service()
+
+        assert first.cancelled() and second.cancelled()
+        assert not ai_service._IN_FLIGHT and not ai_service._PENDING
+        assert ai_service._FLUSH_TASK is None
+        assert ai_service._LIMITER._lock is not lock
+        assert ai_service._CLIENT is None
+
+    def test_retry_after_헤더_해석(self):
+        """초/HTTP 날짜 형식 모두 해석, 잘못된 값은 기본값 / Seconds and HTTP dates parse; junk falls back"""
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+
+        assert ai_service._retry_after_seconds("2") == 2.0
+        assert 28 < ai_service._retry_after_seconds(format_datetime(retry_at, usegmt=True)) <= 30
+        assert ai_service._retry_after_seconds("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+        assert ai_service._retry_after_seconds("soon") == ai_service._RETRY_AFTER_DEFAULT
+        assert ai_service._retry_after_seconds(None) == ai_service._RETRY_AFTER_DEFAULT
+
+
+# ─────────────────────────────────────────────
+# API 테스트 / API Tests
+# ─────────────────────────────────────────────
+STEP_DELAY = 0.02  # 테스트용 단계 간격 (자세 변환 1회 ≈ 0.6초) / Test step delay (one move ≈ 0.6 s)
+
+
+class TestAPI:
+
+    @pytest.fixture(autouse=True)
+    def _quick_moves(self, monkeypatch):
+        """자세 변환 단계 간격 단축 / Shorten the position-change step delay"""
+        move = ActuatorController.move_to_position
+
+        async def quick_move(self, target_name, target_values, steps=30, step_delay=STEP_DELAY):
+            await move(self, target_name, target_values, steps, step_delay)
+
+        monkeypatch.setattr(ActuatorController, "move_to_position", quick_move)
+
+    @pytest.fixture
+    def client(self):
+        with TestClient(app) as client:
+            time.sleep(30 * STEP_DELAY + 0.2)  # 시작 시 초기 자세 적용 대기 / Let the startup move finish
+            yield client
+
+    def test_WebSocket_초기_상태_후_순서대로_전송(self, client):
+        """브로드캐스트와 퐁이 같은 대기열을 거쳐 순서 유지 / Broadcasts and pongs share the queue, so order holds"""
+        with client.websocket_connect("/ws") as ws:
+            assert json.loads(ws.receive_text())["type"] == "initial_status"
+
+            client.post("/api/emergency-stop")
+            ws.send_text("ping")
+
+            assert json.loads(ws.receive_text())["type"] == "emergency_stop"
+            assert ws.receive_text() == "pong"
+
+        assert not app_state.websocket_clients
+
+    @pytest.mark.asyncio
+    async def test_대기열_넘친_클라이언트는_연결_종료(self, monkeypatch):
+        """대기열이 가득 찬 클라이언트는 제거 후 1013으로 종료 / A client with a full queue is dropped and closed with 1013"""
+        monkeypatch.setattr(app_state, "websocket_clients", {})
+        slow, fast = AsyncMock(), AsyncMock()
+        full = asyncio.Queue(1)
+        full.put_nowait("밀린 메시지 / backlog")
+        app_state.websocket_clients.update({slow: full, fast: asyncio.Queue(1)})
+
+        await api.broadcast_to_websockets({"type": "alert"})
+        await asyncio.sleep(0)
+
+        assert list(app_state.websocket_clients) == [fast]
+        slow.close.assert_awaited_once_with(code=1013)
+        assert app_state.websocket_clients[fast].get_nowait() == '{"type":"alert"}'
+
+    @pytest.mark.asyncio
+    async def test_전송_실패한_relay는_클라이언트_정리(self, monkeypatch):
+        """전송이 실패하면 relay가 클라이언트를 제거하고 종료 / A failed send makes the relay drop and close the client"""
+        ws = AsyncMock()
+        ws.send_text.side_effect = RuntimeError("connection reset")
+        queue = asyncio.Queue()
+        queue.put_nowait("상태 / status")
+        monkeypatch.setattr(app_state, "websocket_clients", {ws: queue})
+
+        await asyncio.wait_for(api._relay(ws, queue), timeout=1)
+
+        assert not app_state.websocket_clients
+        ws.close.assert_awaited_once_with(code=1013)
+
+    def test_요청_본문_검증과_형변환(self, client):
+        """빈 본문은 422, "5" 같은 문자열 숫자는 변환 / Empty bodies are 422; numeric strings such as "5" coerce"""
+        assert client.post("/api/scheduler/pause", content=b"").status_code == 422
+        assert client.post("/api/scheduler/pause", json={"duration_minutes": "soon"}).status_code == 422
+
+        response = client.post("/api/scheduler/pause", json={"duration_minutes": "5"})
+        assert response.status_code == 200
+        assert "5분" in response.json()["message"]
+
+    def test_기록은_최신순으로_반환(self, client):
+        """limit만큼 최신 기록부터 반환 / Logs come back newest first, up to limit"""
+        app_state.position_logs.clear()
+        app_state.position_logs.extend({"message": f"기록 {i} / log {i}"} for i in range(5))
+
+        body = client.get("/api/logs", params={"limit": 2}).json()
+
+        assert body["total"] == 5
+        assert [log["message"] for log in body["data"]] == ["기록 4 / log 4", "기록 3 / log 3"]
+        assert client.get("/api/logs", params={"limit": -1}).json()["data"] == []
+
+    def test_요약_스트림_도중_오류는_중단_표시(self, client, monkeypatch):
+        """첫 조각 이후 오류면 본문 끝에 중단 표시 / An error after the first chunk ends the body with a marker"""
+        async def broken_stream(logs, current_status):
+            yield "첫 문장. "
+            raise RuntimeError("upstream closed")
+
+        monkeypatch.setattr(api, "get_patient_summary_stream", broken_stream)
+        response = client.get("/api/ai/summary/stream")
+
+        assert response.status_code == 200
+        assert response.text == "첫 문장. " + api.AI_STREAM_INTERRUPTED
+
+    def test_요약_스트림_시간_초과는_중단_표시(self, client, monkeypatch):
+        """조각 대기 시간 초과도 예외 대신 중단 표시 / A chunk timeout also ends with the marker instead of raising"""
+        async def stalled_stream(logs, current_status):
+            yield "첫 문장. "
+            await asyncio.sleep(10)
+            yield "늦은 문장."
+
+        monkeypatch.setattr(api, "get_patient_summary_stream", stalled_stream)
+        monkeypatch.setattr(api, "AI_SUMMARY_TIMEOUT", 0.2)
+        response = client.get("/api/ai/summary/stream")
+
+        assert response.text == "첫 문장. " + api.AI_STREAM_INTERRUPTED
+
+    def test_일시정지_중_수동_변환_허용(self, client):
+        """일시정지는 자동 변환만 멈춤 / A pause only stops automatic rotation"""
+        client.post("/api/scheduler/pause", json={})
+        response = client.post("/api/position/rotate", json={"position": "left_lateral"})
+        assert response.status_code == 200
+
+        time.sleep(30 * STEP_DELAY + 0.3)
+        assert app_state.scheduler.current_position == Position.LEFT_LATERAL
+
+    def test_긴급_정지_시_이동_중단_및_대기열_폐기(self, client):
+        """긴급 정지는 진행 중 이동, 대기 중 이동, 자동 재개를 모두 취소 / An e-stop aborts the move, queued moves and auto-resume"""
+        client.post("/api/scheduler/pause", json={"duration_minutes": 5})
+        time.sleep(0.1)
+        assert app_state.resume_handle is not None
+
+        client.post("/api/position/rotate", json={"position": "left_lateral"})
+        client.post("/api/position/rotate", json={"position": "right_lateral"})
+        time.sleep(10 * STEP_DELAY)
+        move = app_state.current_move
+        assert move is not None
+
+        assert client.post("/api/emergency-stop").status_code == 200
+        stopped_at = dict(app_state.actuator.current_positions)
+        time.sleep(30 * STEP_DELAY + 0.3)
+
+        assert move.cancelled()
+        assert app_state.current_move is None
+        assert app_state.event_queue.empty()
+        assert app_state.resume_handle is None
+        assert app_state.actuator.current_positions == stopped_at
+        assert stopped_at != POSITION_TARGETS[Position.LEFT_LATERAL]
+        assert app_state.scheduler.current_position == Position.SUPINE
+
+        # 수동 재개 전까지 거절, 재개 후 허용 / Refused until a manual resume, allowed after
+        assert client.post("/api/position/rotate", json={}).status_code == 409
+        client.post("/api/scheduler/resume")
+        assert client.post("/api/position/rotate", json={}).status_code == 200
 
 if __name__ == "__main__":
     # pytest 없이 직접 실행 시 / Direct run without pytest
@@ -202,6 +680,7 @@ if __name__ == "__main__":
         # 자세 정의 테스트
         t3 = TestPositionDefinitions()
         t3.test_모든_자세에_한국어_이름_존재()
+        t3.test_자세_식별_문자열_정의()
         t3.test_모든_자세에_액추에이터_목표값_존재()
         t3.test_앙와위_목표값_모두_0()
         t3.test_액추에이터_목표값_범위_0_100()